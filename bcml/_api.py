@@ -22,7 +22,18 @@ from xml.dom import minidom
 import requests
 import webview
 
-from bcml import DEBUG, install, dev, locks, mergers, upgrade, util
+from bcml import (
+    DEBUG,
+    cache,
+    difflog,
+    install,
+    dev,
+    locks,
+    mergers,
+    stock,
+    upgrade,
+    util,
+)
 from bcml.util import BcmlMod, LOG, SYSTEM, get_7z_path
 from bcml.__version__ import USER_VERSION, VERSION
 
@@ -59,10 +70,13 @@ class Api:
     window: webview.Window
     host: str
     tmp_files: List[Path]
+    _pending_remergers: Optional[List[mergers.Merger]]
 
     def __init__(self, host: str):
         self.host = host
         self.tmp_files = []
+        self._pending_remergers = []
+        util.start_worker_service()
 
     def get_ver(self, params=None):
         updated = Version(util.get_settings("last_version")) < Version(VERSION)
@@ -202,6 +216,7 @@ class Api:
         util.save_settings()
         from bcml.bcml import reload_settings
         reload_settings()
+        util.restart_worker_service()
 
     def old_settings(self):
         old = util.get_data_dir() / "settings.ini"
@@ -389,7 +404,7 @@ class Api:
             util.vprint(f"Installed {len(mods)} mods")
             print(f"Installed {len(mods)} mods")
             try:
-                install.refresh_merges()
+                install.refresh_merges(mergers.get_mod_remergers(m for m in mods if m))
                 print("Install complete")
             except Exception:  # pylint: disable=broad-except
                 pool.terminate()
@@ -405,6 +420,8 @@ class Api:
             options = json.loads((mod.path / "options.json").read_text())
         else:
             options = {}
+        # The updated mod's logs are unknown until installed, so remerge everything
+        self._pending_remergers = None
         rmtree(mod.path)
         with util.start_pool() as pool:
             new_mod = install.install_mod(
@@ -418,12 +435,14 @@ class Api:
     @win_or_lose
     def reprocess(self, params):
         mod = BcmlMod.from_json(params["mod"])
+        self._pending_remergers = None
         rmtree(mod.path / "logs")
         if (mod.path / "options.json").exists():
             options = json.loads((mod.path / "options.json").read_text())
         else:
             options = {}
         install.generate_logs(mod.path, options)
+        difflog.write_container(mod.path / "logs")
 
     @win_or_lose
     @install.refresher
@@ -438,23 +457,26 @@ class Api:
     @win_or_lose
     def apply_queue(self, params):
         mods = []
+        remergers = []
         for move_mod in params["moves"]:
             mod = BcmlMod.from_json(move_mod["mod"])
             mods.append(mod)
+            remergers.extend(mergers.get_mod_remergers([mod]))
             mod.change_priority(move_mod["priority"])
         with util.start_pool() as pool:
             for i in params["installs"]:
                 print(i)
-                mods.append(
-                    install.install_mod(
-                        Path(i["path"].replace("QUEUE", "")),
-                        options=i["options"],
-                        insert_priority=i["priority"],
-                        pool=pool,
-                    )
+                mod = install.install_mod(
+                    Path(i["path"].replace("QUEUE", "")),
+                    options=i["options"],
+                    insert_priority=i["priority"],
+                    pool=pool,
                 )
+                if mod:
+                    mods.append(mod)
+                    remergers.extend(mergers.get_mod_remergers([mod]))
             try:
-                install.refresh_merges()
+                install.refresh_merges(remergers)
             except Exception:  # pylint: disable=broad-except
                 pool.terminate()
                 raise
@@ -464,6 +486,9 @@ class Api:
     def mod_action(self, params):
         mod = BcmlMod.from_json(params["mod"])
         action = params["action"]
+        if action in {"enable", "disable", "uninstall"}:
+            if self._pending_remergers is not None:
+                self._pending_remergers.extend(mergers.get_mod_remergers([mod]))
         if action == "enable":
             install.enable_mod(mod, wait_merge=True)
         elif action == "disable":
@@ -547,18 +572,21 @@ class Api:
                     install.link_master_mod()
                 return
             if params["name"] == "all":
-                install.refresh_merges()
+                install.refresh_merges(self._pending_remergers or None)
             else:
                 [
                     m()
                     for m in mergers.get_mergers()
                     if m().friendly_name == params["name"]
                 ][0].perform_merge()
+                cache.evict()
         except Exception as err:  # pylint: disable=broad-except
             raise Exception(
                 f"There was an error merging your mods. {str(err)}\n"
                 "Note that this could leave your game in an unplayable state."
             )
+        finally:
+            self._pending_remergers = []
 
     @win_or_lose
     def create_backup(self, params):
@@ -873,6 +901,8 @@ class Api:
         return str(path)
 
     def cleanup(self):
+        util.stop_worker_service()
+        stock.clear()
         for file in self.tmp_files:
             try:
                 file.unlink()
@@ -0,0 +1,111 @@
+"""Provides a content-addressed cache of merge results shared between remerges"""
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import oead
+import xxhash  # pylint: disable=wrong-import-order
+
+from bcml import util
+from bcml.__version__ import VERSION
+
+MAX_CACHE_SIZE = 512 * 1024 * 1024
+
+
+def get_cache_dir() -> Path:
+    cache_dir = util.get_storage_dir() / "cache" / "merges"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def _get_diff_bytes(diff: Any) -> bytes:
+    if isinstance(diff, (bytes, bytearray, memoryview, oead.Bytes)):
+        return bytes(diff)
+    if isinstance(diff, str):
+        return diff.encode("utf-8")
+    if isinstance(diff, (oead.byml.Hash, oead.byml.Array)):
+        return bytes(oead.byml.to_binary(diff, big_endian=False))
+    if isinstance(diff, oead.aamp.ParameterIO):
+        return bytes(diff.to_binary())
+    return json.dumps(diff, ensure_ascii=False, sort_keys=True, default=str).encode(
+        "utf-8"
+    )
+
+
+def get_stock_version(file: str, aoc: bool = False) -> str:
+    """Identifies the version of a stock game file by its size and modified time"""
+    name = f"aoc:{file}" if aoc else file
+    try:
+        stat = util.get_game_file(file, aoc=aoc).stat()
+    except FileNotFoundError:
+        return f"{name}:missing"
+    return f"{name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def get_key(
+    merger: str, diff: Any, stock_files: Iterable[str] = (), *extra: str
+) -> str:
+    """
+    Gets the cache key for a merge result from the merger name, its consolidated diff,
+    the stock files it merges into, the platform, and any other distinguishing strings
+    """
+    digest = xxhash.xxh3_128()
+    for part in [
+        merger,
+        VERSION,
+        "wiiu" if util.get_settings("wiiu") else "switch",
+        *sorted(get_stock_version(file) for file in stock_files),
+        *extra,
+    ]:
+        digest.update(part.encode("utf-8") + b"\0")
+    digest.update(_get_diff_bytes(diff))
+    return f"{merger}-{digest.hexdigest()}"
+
+
+def load(key: str) -> Optional[bytes]:
+    """Loads a cached merge result, if present, and marks it as recently used"""
+    path = get_cache_dir() / key
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    util.vprint(f"Restored cached merge {key}")
+    return data
+
+
+def save(key: str, data: bytes):
+    """Stores a merge result, leaving eviction to the end of the merge"""
+    path = get_cache_dir() / key
+    tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data if isinstance(data, bytes) else bytes(data))
+    os.replace(tmp_path, path)
+
+
+def evict(max_size: int = MAX_CACHE_SIZE):
+    """Removes the least recently used merge results over the size limit"""
+    entries = []
+    for entry in get_cache_dir().iterdir():
+        if entry.suffix == ".tmp":
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_size:
+            break
+        try:
+            entry.unlink()
+            total -= size
+        except OSError:
+            continue
+
@@ -16,7 +16,7 @@ from zlib import crc32
 import oead
 import xxhash  # pylint: disable=wrong-import-order
 
-from bcml import util, install
+from bcml import difflog, util, install
 from bcml.util import BYML_EXTS, SARC_EXTS, TempSettingsContext
 from bcml.mergers.pack import SPECIAL
 
@@ -64,7 +64,9 @@ def _package_code(tmp_dir: Path, meta: dict):
         )
 
 
-def _pack_sarcs(tmp_dir: Path, hashes: dict, pool: multiprocessing.pool.Pool):
+def _pack_sarcs(
+    tmp_dir: Path, hashes: util.StockHashTable, pool: multiprocessing.pool.Pool
+):
     sarc_folders = {
         d
         for d in tmp_dir.rglob("**/*")
@@ -88,7 +90,7 @@ def _pack_sarcs(tmp_dir: Path, hashes: dict, pool: multiprocessing.pool.Pool):
         pool.map(partial(_pack_sarc, hashes=hashes, tmp_dir=tmp_dir), pack_folders)
 
 
-def _pack_sarc(folder: Path, tmp_dir: Path, hashes: dict):
+def _pack_sarc(folder: Path, tmp_dir: Path, hashes: util.StockHashTable):
     packed = oead.SarcWriter(
         endian=oead.Endianness.Big
         if util.get_settings("wiiu")
@@ -139,7 +141,9 @@ def _pack_sarc(folder: Path, tmp_dir: Path, hashes: dict):
 CLEAN_EXTS = util.SARC_EXTS - {".beventpack", ".sbeventpack"}
 
 
-def _clean_sarcs(tmp_dir: Path, hashes: dict, pool: multiprocessing.pool.Pool):
+def _clean_sarcs(
+    tmp_dir: Path, hashes: util.StockHashTable, pool: multiprocessing.pool.Pool
+):
     sarc_files = {
         file
         for file in tmp_dir.rglob("**/*")
@@ -221,7 +225,7 @@ def _clean_sarc(old_sarc: oead.Sarc, base_sarc: oead.Sarc) -> Optional[oead.Sarc
     return None if can_delete else new_sarc
 
 
-def _clean_sarc_file(file: Path, hashes: dict, tmp_dir: Path):
+def _clean_sarc_file(file: Path, hashes: util.StockHashTable, tmp_dir: Path):
     canon = util.get_canon_name(file.relative_to(tmp_dir))
     try:
         stock_file = util.get_game_file(file.relative_to(tmp_dir))
@@ -423,6 +427,8 @@ def create_bnp_mod(mod: Path, output: Path, meta: dict, options: Optional[dict]
     print("Cleaning any junk files...")
     for file in {f for f in tmp_dir.rglob("**/*") if f.is_file()}:
         if "logs" in file.parts:
+            if file.name == difflog.CONTAINER_NAME:
+                file.unlink()
             continue
         if (
             file.suffix in {".yml", ".json", ".bak", ".tmp", ".old", ".bnp"}
@@ -0,0 +1,280 @@
+"""Provides a compact binary container for merger logs with a lazy, indexed reader"""
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import oead
+from oead.aamp import (  # pylint:disable=import-error
+    Parameter,
+    ParameterIO,
+    ParameterObject,
+)
+
+from bcml import util
+
+CONTAINER_NAME = "diffs.bdl"
+MAGIC = b"BDLG"
+VERSION = 3
+_HEADER = struct.Struct("<4sHHQI")
+
+
+def _get_kind(log: Path) -> str:
+    return {".yml": "byml", ".json": "json", ".aamp": "aamp"}.get(log.suffix, "text")
+
+
+def _parse_log(log: Path) -> Tuple[str, Any]:
+    kind = _get_kind(log)
+    if kind == "byml":
+        text = log.read_text("utf-8")
+        try:
+            return kind, oead.byml.from_text(text)
+        except (RuntimeError, ValueError, oead.InvalidDataError):
+            return "text", text
+    if kind == "json":
+        return kind, json.loads(log.read_text("utf-8"))
+    if kind == "aamp":
+        raw = log.read_bytes()
+        try:
+            return kind, ParameterIO.from_binary(raw)
+        except (RuntimeError, ValueError, oead.InvalidDataError):
+            return kind, ParameterIO.from_text(raw.decode("utf-8"))
+    return kind, log.read_bytes().decode("utf-8")
+
+
+def _encode(kind: str, data: Any) -> bytes:
+    if kind == "byml":
+        return bytes(oead.byml.to_binary(data, False))
+    if kind == "json":
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+    if kind == "aamp":
+        return bytes(data.to_binary())
+    return data.encode("utf-8")
+
+
+def _decode(kind: str, payload: bytes) -> Any:
+    if kind == "byml":
+        return oead.byml.from_binary(payload)
+    if kind == "json":
+        return json.loads(payload.decode("utf-8"))
+    if kind == "aamp":
+        return ParameterIO.from_binary(payload)
+    return payload.decode("utf-8")
+
+
+def _split_log(kind: str, data: Any) -> Optional[Dict[str, Any]]:
+    """Splits a parsed log into its entries by canonical file, if it is keyed by file"""
+    if kind == "byml" and isinstance(data, oead.byml.Hash):
+        return dict(data.items())
+    if kind == "json" and isinstance(data, dict):
+        return data
+    if kind == "aamp":
+        try:
+            file_table = data.objects["FileTable"]
+        except KeyError:
+            return None
+        return {file.v: data.lists[file.v] for _, file in file_table.params.items()}
+    return None
+
+
+def _join_log(kind: str, entries: Dict[str, Any]) -> Any:
+    if kind == "byml":
+        return oead.byml.Hash(entries)
+    if kind == "json":
+        return entries
+    pio = ParameterIO()
+    pio.objects["FileTable"] = ParameterObject()
+    for i, (file, plist) in enumerate(entries.items()):
+        pio.objects["FileTable"].params[f"File{i}"] = Parameter(file)
+        pio.lists[file] = plist
+    return pio
+
+
+def _select(kind: str, data: Any, keys: Optional[Iterable[str]]) -> Any:
+    if keys is None:
+        return data
+    entries = _split_log(kind, data)
+    if entries is None:
+        return data
+    return _join_log(kind, {key: entries[key] for key in keys if key in entries})
+
+
+class DiffLog:
+    """
+    A lazy reader for the binary log container in a mod's log folder. The file holds
+    a header pointing to a JSON index of the logs it contains. Logs keyed by file are
+    stored as one binary entry per file, so a merger can read and parse only the
+    entries it needs; other logs are stored whole in their compact binary form.
+    """
+
+    path: Path
+    _sections: Dict[str, dict]
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as log_file:
+            magic, version, _, index_offset, index_size = _HEADER.unpack(
+                log_file.read(_HEADER.size)
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a supported BCML log container")
+            log_file.seek(index_offset)
+            self._sections = json.loads(log_file.read(index_size).decode("utf-8"))
+
+    def is_current(self, log: Path) -> bool:
+        """Checks whether the container holds the current version of a log file"""
+        section = self._sections.get(log.name)
+        if not section:
+            return False
+        try:
+            stat = log.stat()
+        except FileNotFoundError:
+            return False
+        return section["size"] == stat.st_size and section["mtime"] == stat.st_mtime_ns
+
+    def get_keys(self, name: str) -> Optional[List[str]]:
+        """Gets the files a log has entries for, or None if it is not keyed by file"""
+        entries = self._sections[name].get("entries")
+        return list(entries) if entries is not None else None
+
+    def _read_range(self, name: str) -> bytes:
+        section = self._sections[name]
+        with self.path.open("rb") as log_file:
+            log_file.seek(section["offset"])
+            return log_file.read(section["length"])
+
+    def read(self, name: str, keys: Optional[Iterable[str]] = None) -> Any:
+        """Reads and parses a log, limited to the given files if it is keyed by file"""
+        section = self._sections[name]
+        kind, entries = section["kind"], section.get("entries")
+        if entries is None:
+            return _decode(kind, self._read_range(name))
+        keys = list(entries) if keys is None else [k for k in keys if k in entries]
+        data = {}
+        with self.path.open("rb") as log_file:
+            for key in keys:
+                offset, length = entries[key]
+                log_file.seek(section["offset"] + offset)
+                data[key] = _split_log(kind, _decode(kind, log_file.read(length)))[key]
+        return _join_log(kind, data)
+
+    @staticmethod
+    def _encode_section(log: Path) -> Tuple[dict, bytes]:
+        kind, data = _parse_log(log)
+        entries = _split_log(kind, data)
+        if entries is None:
+            payload = _encode(kind, data)
+            return {"kind": kind, "length": len(payload)}, payload
+        payload = bytearray()
+        index = {}
+        for key, value in entries.items():
+            entry = _encode(kind, _join_log(kind, {key: value}))
+            index[key] = [len(payload), len(entry)]
+            payload += entry
+        return {"kind": kind, "length": len(payload), "entries": index}, payload
+
+    @staticmethod
+    def write(log_dir: Path, old: Optional["DiffLog"] = None) -> "DiffLog":
+        """
+        Writes the container for a log folder, copying the sections of an old container
+        which are still current and encoding every other log
+        """
+        path = log_dir / CONTAINER_NAME
+        sections: Dict[str, dict] = {}
+        payload = bytearray()
+        for log in sorted(log_dir.iterdir()):
+            if log.name == CONTAINER_NAME or log.suffix == ".tmp" or not log.is_file():
+                continue
+            if old and old.is_current(log):
+                section = dict(old._sections[log.name])
+                data = old._read_range(log.name)
+            else:
+                try:
+                    section, data = DiffLog._encode_section(log)
+                except (
+                    RuntimeError,
+                    ValueError,
+                    UnicodeDecodeError,
+                    oead.InvalidDataError,
+                ) as err:
+                    util.vprint(f"Could not add {log} to the log container: {err}")
+                    continue
+                stat = log.stat()
+                section.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+            section["offset"] = _HEADER.size + len(payload)
+            sections[log.name] = section
+            payload += data
+        index = json.dumps(sections, ensure_ascii=False).encode("utf-8")
+        tmp_path = path.with_name(f"{CONTAINER_NAME}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(
+            _HEADER.pack(MAGIC, VERSION, 0, _HEADER.size + len(payload), len(index))
+            + payload
+            + index
+        )
+        os.replace(tmp_path, path)
+        return DiffLog(path)
+
+
+_CONTAINERS: Dict[Path, Tuple[int, DiffLog]] = {}
+
+
+def _open_container(log_dir: Path) -> Optional[DiffLog]:
+    path = log_dir / CONTAINER_NAME
+    try:
+        mtime = path.stat().st_mtime_ns
+        if path in _CONTAINERS and _CONTAINERS[path][0] == mtime:
+            return _CONTAINERS[path][1]
+        container = DiffLog(path)
+    except (FileNotFoundError, ValueError, struct.error, json.JSONDecodeError):
+        _CONTAINERS.pop(path, None)
+        return None
+    _CONTAINERS[path] = (mtime, container)
+    return container
+
+
+def write_container(log_dir: Path):
+    """
+    Compiles the logs in a folder into its binary container, reusing the sections of
+    the existing container which are still current
+    """
+    if not log_dir.is_dir():
+        return
+    try:
+        container = DiffLog.write(log_dir, _open_container(log_dir))
+    except OSError as err:
+        util.vprint(f"Could not write log container in {log_dir}: {err}")
+        return
+    _CONTAINERS[container.path] = (container.path.stat().st_mtime_ns, container)
+
+
+def read_log(log: Path, keys: Optional[Iterable[str]] = None) -> Any:
+    """
+    Reads a merger log, limited to the entries for the given files if the log is keyed
+    by file. Logs are read through the binary container in their folder when it holds
+    their current version, and parsed from the log file otherwise. BYML logs are
+    returned as BYML, JSON logs as JSON, AAMP logs as a ParameterIO, and anything else
+    as text.
+    """
+    container = _open_container(log.parent)
+    if container and container.is_current(log):
+        return container.read(log.name, keys)
+    return _select(*_parse_log(log), keys)
+
+
+def is_compiled(log: Path) -> bool:
+    """Checks whether the binary container in a log's folder holds its current version"""
+    container = _open_container(log.parent)
+    return bool(container and container.is_current(log))
+
+
+def get_log_keys(log: Path) -> List[str]:
+    """Gets the files a merger log has entries for, without parsing the entries"""
+    container = _open_container(log.parent)
+    if container and container.is_current(log):
+        keys = container.get_keys(log.name)
+    else:
+        keys = _split_log(*_parse_log(log))
+    return list(keys) if keys is not None else []
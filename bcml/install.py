@@ -11,23 +11,101 @@ import re
 import shutil
 import stat
 import subprocess
+import zipfile
 from functools import partial
 from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 from platform import system
 from shutil import rmtree, copyfile
 from tempfile import TemporaryDirectory, mkdtemp
-from typing import List, Union, Callable, Dict, Any, Optional
+from typing import List, Union, Callable, Dict, Any, Optional, Iterable, Set
 from xml.dom import minidom
 
 import oead
 
-from bcml import util, mergers, dev, upgrade
+try:
+    import py7zr
+except ImportError:
+    py7zr = None  # pylint: disable=invalid-name
+
+from bcml import cache, difflog, util, mergers, dev, upgrade
+from bcml.mergers import rstable
 from bcml import bcml as rsext
 from bcml.util import SYSTEM, BcmlMod, get_7z_path
 
 
+def _extract_zip_members(path: Path, out: Path, members: List[str]):
+    with zipfile.ZipFile(path) as archive:
+        for member in members:
+            try:
+                archive.extract(member, out)
+            except FileExistsError:
+                # Another thread created the same parent folder at the same time
+                archive.extract(member, out)
+
+
+def extract_zip(path: Path, out: Path):
+    """
+    Extracts a zip archive in-process, with its files split between several threads,
+    since inflating releases the GIL
+    """
+    with zipfile.ZipFile(path) as archive:
+        members = archive.namelist()
+    out.mkdir(parents=True, exist_ok=True)
+    threads = max(min(len(members), os.cpu_count() or 1), 1)
+    with ThreadPool(threads) as pool:
+        pool.starmap(
+            _extract_zip_members,
+            ((path, out, members[i::threads]) for i in range(threads)),
+        )
+
+
+def extract_7z(path: Path, out: Path) -> bool:
+    """
+    Extracts a 7z archive, such as a BNP, in-process, returning False if it is not a
+    7z archive or uses a method which must be left to the 7z helper
+    """
+    if py7zr is None or not py7zr.is_7zfile(path):
+        return False
+    try:
+        with py7zr.SevenZipFile(path) as archive:
+            archive.extractall(out)
+    except py7zr.exceptions.UnsupportedCompressionMethodError:
+        shutil.rmtree(out, ignore_errors=True)
+        return False
+    return True
+
+
+def _read_7z_meta(mod: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with py7zr.SevenZipFile(mod) as archive:
+            for member in archive.getnames():
+                if member.split("/")[-1] == "info.json":
+                    with TemporaryDirectory() as tmp_dir:
+                        archive.extract(tmp_dir, targets=[member])
+                        return json.loads((Path(tmp_dir) / member).read_text("utf-8"))
+            return {}
+    except py7zr.exceptions.UnsupportedCompressionMethodError:
+        return None
+    except (py7zr.exceptions.ArchiveError, OSError, ValueError):
+        return {}
+
+
 def extract_mod_meta(mod: Path) -> Dict[str, Any]:
+    if zipfile.is_zipfile(mod):
+        with zipfile.ZipFile(mod) as archive:
+            for member in archive.namelist():
+                if member.split("/")[-1] == "info.json":
+                    try:
+                        return json.loads(archive.read(member).decode("utf-8"))
+                    except (ValueError, UnicodeDecodeError):
+                        return {}
+        return {}
+    if py7zr is not None and py7zr.is_7zfile(mod):
+        meta = _read_7z_meta(mod)
+        if meta is not None:
+            return meta
     result: subprocess.CompletedProcess
     if util.SYSTEM == "Windows":
         result = subprocess.run(
@@ -75,19 +153,23 @@ def open_mod(path: Path) -> Path:
     if tmpdir.exists():
         shutil.rmtree(tmpdir, ignore_errors=True)
     if path.suffix.lower() in archive_formats:
-        x_args = [get_7z_path(), "x", str(path), f"-o{str(tmpdir)}"]
-        if system() == "Windows":
-            subprocess.run(
-                x_args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=util.CREATE_NO_WINDOW,
-                check=False,
-            )
-        else:
-            subprocess.run(
-                x_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
-            )
+        if zipfile.is_zipfile(path):
+            extract_zip(path, tmpdir)
+        elif not extract_7z(path, tmpdir):
+            # RAR archives, and 7z methods py7zr cannot read, go through the 7z helper
+            x_args = [get_7z_path(), "x", str(path), f"-o{str(tmpdir)}"]
+            if system() == "Windows":
+                subprocess.run(
+                    x_args,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    creationflags=util.CREATE_NO_WINDOW,
+                    check=False,
+                )
+            else:
+                subprocess.run(
+                    x_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+                )
     elif path.suffix.lower() in meta_formats:
         shutil.copytree(path.parent, tmpdir)
     else:
@@ -169,14 +251,15 @@ def find_modded_files(
         / "Pack"
         / "AocMainField.pack"
     )
+    # Map units packed in AocMainField.pack are unpacked as loose files before the
+    # scan, which reads each of them once, and the emptied pack costs nothing to hash
     if aoc_field.exists() and aoc_field.stat().st_size > 0:
-        if not list(
-            (
-                tmp_dir
-                / util.get_dlc_path()
-                / ("0010" if util.get_settings("wiiu") else "")
-            ).rglob("Map/**/?-?_*.smubin")
-        ):
+        loose_units = (
+            tmp_dir
+            / util.get_dlc_path()
+            / ("0010" if util.get_settings("wiiu") else "")
+        ).rglob("Map/**/?-?_*.smubin")
+        if next(loose_units, None) is None:
             aoc_pack = oead.Sarc(aoc_field.read_bytes())
             for file in aoc_pack.get_files():
                 ex_out = (
@@ -186,12 +269,16 @@ def find_modded_files(
                     / file.name
                 )
                 ex_out.parent.mkdir(parents=True, exist_ok=True)
+                if ex_out.exists():
+                    ex_out.unlink()
                 ex_out.write_bytes(file.data)
         aoc_field.write_bytes(b"")
 
     modded_files = [
         f if "//" in f else Path(f)
-        for f in rsext.find_modified_files(str(tmp_dir))
+        for f in rsext.find_modified_files(
+            str(tmp_dir), str(util.get_hash_table(util.get_settings("wiiu")).path)
+        )
     ]
     return modded_files
 
@@ -255,6 +342,7 @@ def generate_logs(
     if not pool:
         this_pool.close()
         this_pool.join()
+    cache.evict()
     util.vprint(modded_files)
     return modded_files
 
@@ -298,10 +386,9 @@ def install_mod(
                 print(f"Cannot open mod at {str(mod)}, no rules.txt or info.json found")
                 return
             print(f"Loading mod from {str(mod)}...")
-            tmp_dir = Path(mkdtemp())
-            if tmp_dir.exists():
-                shutil.rmtree(tmp_dir)
-            shutil.copytree(str(mod), str(tmp_dir))
+            # Staged beside the modpack so it can be linked and moved into place
+            tmp_dir = Path(mkdtemp(dir=util.get_stage_dir()))
+            util.stage_tree(mod, tmp_dir)
             if (mod / "rules.txt").exists() and not (mod / "info.json").exists():
                 print("Upgrading old mod format...")
                 upgrade.convert_old_mod(mod, delete_old=True)
@@ -420,6 +507,10 @@ def install_mod(
                             out.unlink()
                             os.link(file, out)
 
+    print("Compiling mod logs...")
+    for log_dir in [tmp_dir / "logs", *tmp_dir.glob("options/*/logs")]:
+        difflog.write_container(log_dir)
+
     rstb_path = (
         tmp_dir
         / util.get_content_path()
@@ -434,6 +525,7 @@ def install_mod(
     print(f"Assigned mod priority of {priority}")
     mod_id = util.get_mod_id(mod_name, priority)
     mod_dir = util.get_modpack_dir() / mod_id
+    created = False
 
     try:
         if not updated:
@@ -456,21 +548,22 @@ def install_mod(
 
         mod_dir.parent.mkdir(parents=True, exist_ok=True)
         print(f"Moving mod to {str(mod_dir)}...")
-        if mod.is_file():
+        # shutil.move would put the mod inside an existing folder instead of failing
+        if mod_dir.exists():
+            raise FileExistsError(f"A mod is already installed at {str(mod_dir)}")
+        created = True
+        try:
+            shutil.move(str(tmp_dir), str(mod_dir))
+        except Exception:  # pylint: disable=broad-except
             try:
-                shutil.move(str(tmp_dir), str(mod_dir))
+                shutil.rmtree(str(mod_dir))
+                shutil.copytree(str(tmp_dir), str(mod_dir))
+                shutil.rmtree(str(tmp_dir), ignore_errors=True)
             except Exception:  # pylint: disable=broad-except
-                try:
-                    shutil.rmtree(str(mod_dir))
-                    shutil.copytree(str(tmp_dir), str(mod_dir))
-                    shutil.rmtree(str(tmp_dir), ignore_errors=True)
-                except Exception:  # pylint: disable=broad-except
-                    raise OSError(
-                        "BCML could not transfer your mod from the temp directory to the"
-                        " BCML directory."
-                    )
-        elif mod.is_dir():
-            shutil.copytree(str(tmp_dir), str(mod_dir))
+                raise OSError(
+                    "BCML could not transfer your mod from the temp directory to the"
+                    " BCML directory."
+                )
 
         shutil.rmtree(tmp_dir, ignore_errors=True)
 
@@ -481,6 +574,7 @@ def install_mod(
         (mod_dir / "options.json").write_text(
             json.dumps(options, ensure_ascii=False, indent=2), encoding="utf-8"
         )
+        util.invalidate_mod_index()
 
         output_mod = BcmlMod(mod_dir)
         try:
@@ -489,7 +583,7 @@ def install_mod(
         except Exception:  # pylint: disable=broad-except
             pass
     except Exception as err:  # pylint: disable=broad-except
-        if mod_dir.exists():
+        if created and mod_dir.exists():
             try:
                 uninstall_mod(mod_dir, wait_merge=True)
             except Exception:  # pylint: disable=broad-except
@@ -498,12 +592,13 @@ def install_mod(
 
     try:
         if merge_now:
-            for merger in [m() for m in mergers.get_mergers()]:
+            remergers = [m() for m in mergers.get_mergers()]
+            for merger in remergers:
                 if this_pool or pool:
                     merger.set_pool(this_pool or pool)
                 if merger.NAME in options["options"]:
                     merger.set_options(options["options"][merger.NAME])
-                merger.perform_merge()
+            _perform_merges(remergers)
     except Exception as err:  # pylint: disable=broad-except
         raise util.MergeError(err) from err
 
@@ -515,15 +610,13 @@ def install_mod(
 
 @refresher
 def disable_mod(mod: BcmlMod, wait_merge: bool = False):
-    remergers = []
     print(f"Disabling {mod.name}...")
-    for merger in [merger() for merger in mergers.get_mergers()]:  # type: ignore
-        if merger.is_mod_logged(mod):
-            remergers.append(merger)
+    remergers = mergers.get_mod_remergers([mod])
     (mod.path / ".disabled").write_bytes(b"")
+    util.invalidate_mod_index()
     if not wait_merge:
         print("Remerging...")
-        refresh_merges()
+        refresh_merges(remergers)
     print(f"{mod.name} disabled")
 
 
@@ -531,9 +624,10 @@ def disable_mod(mod: BcmlMod, wait_merge: bool = False):
 def enable_mod(mod: BcmlMod, wait_merge: bool = False):
     print(f"Enabling {mod.name}...")
     (mod.path / ".disabled").unlink()
+    util.invalidate_mod_index()
     if not wait_merge:
         print("Remerging...")
-        refresh_merges()
+        refresh_merges(mergers.get_mod_remergers([mod]))
     print(f"{mod.name} enabled")
 
 
@@ -555,6 +649,7 @@ def force_del(func, path, exc):
 @refresher
 def uninstall_mod(mod: BcmlMod, wait_merge: bool = False):
     has_patches = (mod.path / "patches").exists()
+    remergers = mergers.get_mod_remergers([mod])
     try:
         shutil.rmtree(str(mod.path), onerror=force_del)
     except (OSError, PermissionError, WindowsError) as err:
@@ -565,6 +660,7 @@ def uninstall_mod(mod: BcmlMod, wait_merge: bool = False):
             "and try again. The location of the folder is "
             f"<code>{str(mod.path)}</code>."
         ) from err
+    util.invalidate_mod_index()
 
     for fall_mod in [
         m for m in util.get_installed_mods(True) if m.priority > mod.priority
@@ -576,7 +672,7 @@ def uninstall_mod(mod: BcmlMod, wait_merge: bool = False):
         util.create_bcml_graphicpack_if_needed()
     else:
         if not wait_merge:
-            refresh_merges()
+            refresh_merges(remergers)
 
     if has_patches and not util.get_settings("no_cemu"):
         shutil.rmtree(
@@ -590,16 +686,91 @@ def uninstall_mod(mod: BcmlMod, wait_merge: bool = False):
     print(f"{mod.name} has been uninstalled.")
 
 
-def refresh_merges():
-    print("Cleansing old merges...")
-    shutil.rmtree(util.get_master_modpack_dir(), True)
-    print("Refreshing merged mods...")
-    with util.start_pool() as pool:
-        for merger in mergers.sort_mergers(
-            [merger_class() for merger_class in mergers.get_mergers()]
+def _get_supplied_files() -> Set[str]:
+    supplied = set()
+    for mod in util.get_installed_mods():
+        for file in mod.path.rglob("**/*"):
+            rel = file.relative_to(mod.path)
+            if rel.parts[0] == "logs" or not file.is_file():
+                continue
+            if rel.parts[0] == "options":
+                rel = Path(*rel.parts[2:])
+            try:
+                supplied.add(util.get_canon_name(rel.as_posix()))
+            except ValueError:
+                continue
+    return supplied
+
+
+def _clean_merged_files(remergers: List[mergers.Merger]):
+    merged_files = {
+        file
+        for merger in remergers
+        for file in merger.get_written_files()
+        if "//" not in file and not any(char in file for char in "*?[!")
+    }
+    # Outputs declared by pattern are left over when the last mod supplying them
+    # is removed, so anything no remaining mod supplies gets cleaned up as well
+    glob_mergers = [
+        merger
+        for merger in remergers
+        if any(
+            "//" not in file
+            and not file.startswith("!")
+            and any(char in file for char in "*?[")
+            for file in merger.get_written_files()
+        )
+    ]
+    supplied = _get_supplied_files() if glob_mergers else set()
+    master = util.get_master_modpack_dir()
+    for file in {
+        f for f in master.rglob("**/*") if f.is_file() and "logs" not in f.parts
+    }:
+        try:
+            canon = util.get_canon_name(file.relative_to(master).as_posix())
+        except ValueError:
+            continue
+        if canon in merged_files or (
+            canon not in supplied
+            and any(mergers.writes_file(merger, canon) for merger in glob_mergers)
         ):
-            merger.set_pool(pool)
+            file.unlink()
+
+
+def _perform_merges(remergers: Iterable[mergers.Merger]):
+    with util.SarcInjectionSession() as session, rstable.RstbSession():
+        for merger in remergers:
+            if session.pending and mergers.reads_whole_files(merger, session.pending):
+                session.flush()
             merger.perform_merge()
+    cache.evict()
+
+
+def refresh_merges(remergers: Optional[Iterable[mergers.Merger]] = None):
+    if remergers is None:
+        print("Cleansing old merges...")
+        shutil.rmtree(util.get_master_modpack_dir(), True)
+        print("Refreshing merged mods...")
+        with util.start_pool() as pool:
+            remergers = mergers.sort_mergers(
+                [merger_class() for merger_class in mergers.get_mergers()]
+            )
+            for merger in remergers:
+                merger.set_pool(pool)
+            _perform_merges(remergers)
+        return
+
+    remergers = mergers.get_dependent_mergers(remergers)
+    if not remergers:
+        print("No remerge necessary")
+        return
+    print("Cleansing affected merges...")
+    _clean_merged_files(remergers)
+    print(f"Refreshing {len(remergers)} affected merges...")
+    with util.start_pool() as pool:
+        for merger in remergers:
+            merger.set_pool(pool)
+        _perform_merges(remergers)
 
 
 def create_backup(name: str = ""):
@@ -1,9 +1,10 @@
 """ Provides abstracted merging objects """
 from abc import ABCMeta
+from fnmatch import fnmatch
 from multiprocessing.pool import Pool
 from pathlib import Path
-from typing import List, Union, Type, Set, Optional, Tuple, Iterable
-from bcml import util
+from typing import Dict, List, Union, Type, Set, Optional, Tuple, Iterable
+from bcml import difflog, util
 
 
 class Merger(metaclass=ABCMeta):
@@ -18,6 +19,7 @@ class Merger(metaclass=ABCMeta):
     _log_name: str
     _options: dict
     _pool: Optional[Pool]
+    _partials: Optional[Set[str]]
 
     def __init__(
         self, friendly_name: str, description: str, log_name: str, options: dict = None
@@ -26,6 +28,7 @@ class Merger(metaclass=ABCMeta):
         self._description = description
         self._log_name = log_name
         self._pool = None
+        self._partials = None
         if options:
             self._options = options
         else:
@@ -46,6 +49,11 @@ class Merger(metaclass=ABCMeta):
         """The name of the log file created by this merger"""
         return self._log_name
 
+    @property
+    def partials(self) -> Optional[Set[str]]:
+        """The files the next merge is limited to, if this is a partial remerge"""
+        return self._partials
+
     def set_pool(self, pool: Pool):
         """Sets the multiprocessing Pool to use when merging"""
         self._pool = pool
@@ -54,6 +62,11 @@ class Merger(metaclass=ABCMeta):
         """Sets custom options for this merger"""
         self._options = options
 
+    def set_partials(self, partials: Iterable[str]):
+        """Limits the next merge to the given files, if merger supports partial remerge"""
+        if self.can_partial_remerge():
+            self._partials = set(partials)
+
     def generate_diff(self, mod_dir: Path, modded_files: List[Union[str, Path]]):
         """Detects changes made to a modded file or files from the base game"""
         raise NotImplementedError
@@ -70,6 +83,28 @@ class Merger(metaclass=ABCMeta):
         """Gets the logged diff for this merge in a given mod"""
         raise NotImplementedError
 
+    def read_log(self, log_dir: Path, files: Iterable[str] = None):
+        """
+        Reads this merger's log from a log folder through the binary log container,
+        limited to the entries for the given files if the log is keyed by file
+        """
+        return difflog.read_log(log_dir / self._log_name, files)
+
+    def get_log_files(self, log_dir: Path) -> List[str]:
+        """Gets the files this merger's log in a log folder has entries for"""
+        return difflog.get_log_keys(log_dir / self._log_name)
+
+    def get_mod_log_files(self, mod: util.BcmlMod) -> Set[str]:
+        """Gets the files this merger's logs for a mod and its options have entries for"""
+        files: Set[str] = set()
+        for log_dir in [
+            mod.path / "logs",
+            *{d / "logs" for d in (mod.path / "options").glob("*") if d.is_dir()},
+        ]:
+            if (log_dir / self._log_name).exists():
+                files.update(self.get_log_files(log_dir))
+        return files
+
     def get_mod_edit_info(self, mod: util.BcmlMod) -> set:
         """Gets a list of modified items in mod for this merger"""
         raise NotImplementedError
@@ -102,6 +137,21 @@ class Merger(metaclass=ABCMeta):
         """Gets a list of files affected by a mod, if merger supports partial remerge"""
         return []
 
+    def get_read_files(self) -> Set[str]:
+        """
+        Gets the canonical paths of merged files this merger reads from the master mod.
+        Paths may be glob patterns, and files nested in a SARC are joined with `//`.
+        """
+        return set()
+
+    def get_written_files(self) -> Set[str]:
+        """
+        Gets the canonical paths of files this merger writes to the master mod. Paths
+        may be glob patterns, files nested in a SARC are joined with `//`, and patterns
+        beginning with `!` exclude matching files.
+        """
+        return {"*"}
+
     def perform_merge(self):
         """Applies one or more patches to the current mod installation"""
         raise NotImplementedError
@@ -159,6 +209,100 @@ def get_mergers() -> List[Type[Merger]]:
     ]
 
 
+def _split_patterns(files: Set[str]) -> Tuple[Set[str], Set[str]]:
+    return (
+        {file for file in files if not file.startswith("!")},
+        {file[1:] for file in files if file.startswith("!")},
+    )
+
+
+def _files_overlap(files: Set[str], other_files: Set[str]) -> bool:
+    includes, excludes = _split_patterns(files)
+    other_includes, other_excludes = _split_patterns(other_files)
+    return any(
+        (fnmatch(file, other) or fnmatch(other, file))
+        and not any(fnmatch(file, exclude) for exclude in other_excludes)
+        and not any(fnmatch(other, exclude) for exclude in excludes)
+        for file in includes
+        for other in other_includes
+    )
+
+
+def _is_overwritten(merger: Merger, written: Set[str]) -> bool:
+    files = merger.get_read_files() | merger.get_written_files()
+    # Rewriting a whole SARC also replaces anything injected into it
+    files |= {file.split("//")[0] for file in files if "//" in file}
+    return _files_overlap(files, written)
+
+
+def writes_file(merger: Merger, file: str) -> bool:
+    """
+    Checks whether a merger writes a file in the master mod, given its canonical path,
+    by the patterns it declares for whole files
+    """
+    includes, excludes = _split_patterns(merger.get_written_files())
+    return any(
+        fnmatch(file, pattern) for pattern in includes if "//" not in pattern
+    ) and not any(fnmatch(file, exclude) for exclude in excludes)
+
+
+def reads_whole_files(merger: Merger, files: Set[str]) -> bool:
+    """
+    Checks whether a merger reads any of the given files, including by reading a
+    file nested inside one of them, or replaces any of them entirely
+    """
+    read = merger.get_read_files()
+    read |= {file.split("//")[0] for file in read if "//" in file}
+    written = {file for file in merger.get_written_files() if "//" not in file}
+    return _files_overlap(read | written, files)
+
+
+def get_dependent_mergers(changed: Iterable[Merger]) -> List[Merger]:
+    """
+    Expands a collection of mergers whose diffs have changed with every merger that
+    reads or writes any file they write, and returns them all in merge order. Mergers
+    which support partial remerges and are only pulled in this way rebuild nothing but
+    the outputs that went missing.
+    """
+    remergers: Dict[str, Merger] = {}
+    for merger in changed:
+        existing = remergers.get(merger.NAME)
+        if existing is None or merger.partials is None:
+            remergers[merger.NAME] = merger
+        elif existing.partials is not None:
+            existing.set_partials(existing.partials | merger.partials)
+    written = [merger.get_written_files() for merger in remergers.values()]
+    added = True
+    while added:
+        added = False
+        for merger in [m() for m in get_mergers()]:  # type: ignore
+            if merger.NAME in remergers:
+                continue
+            if any(_is_overwritten(merger, files) for files in written):
+                merger.set_partials(set())
+                remergers[merger.NAME] = merger
+                written.append(merger.get_written_files())
+                added = True
+    return sort_mergers(remergers.values())
+
+
+def get_mod_remergers(mods: Iterable[util.BcmlMod]) -> List[Merger]:
+    """
+    Gets the mergers logged for a collection of mods, limited to the files those mods
+    affect for mergers which support partial remerges
+    """
+    remergers = {}
+    partials: Dict[str, Set[str]] = {}
+    for mod in mods:
+        for merger in get_mergers_for_mod(mod):
+            remergers[merger.NAME] = merger
+        for name, files in mod.get_partials().items():
+            partials.setdefault(name, set()).update(files)
+    for name, files in partials.items():
+        remergers[name].set_partials(files)
+    return list(remergers.values())
+
+
 def get_mergers_for_mod(mod: util.BcmlMod) -> Set[Merger]:
     mergers = set()
     for merger in [m() for m in get_mergers()]:  # type: ignore
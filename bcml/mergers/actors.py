@@ -6,7 +6,7 @@ from zlib import crc32
 
 import oead
 
-from bcml import util, mergers
+from bcml import cache, util, mergers
 from bcml.util import BcmlMod
 from bcml import bcml as rsext
 
@@ -55,18 +55,14 @@ class ActorInfoMerger(mergers.Merger):
         if self.is_mod_logged(mod):
             util.dict_merge(
                 diffs,
-                oead.byml.from_text(
-                    (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-                ),
+                self.read_log(mod.path / "logs"),
                 overwrite_lists=True,
             )
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diffs,
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    ),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diffs
@@ -106,9 +102,22 @@ class ActorInfoMerger(mergers.Merger):
             return
 
         bin_data = oead.byml.to_binary(modded_actors, False)
+        cache_key = cache.get_key(
+            self.NAME, bin_data, ["Actor/ActorInfo.product.sbyml"]
+        )
+        data = cache.load(cache_key)
+        if data is not None:
+            actor_path.parent.mkdir(parents=True, exist_ok=True)
+            actor_path.write_bytes(data)
+            print("Actor info restored from cache")
+            return
         rsext.mergers.actorinfo.merge_actorinfo(bin_data)
+        cache.save(cache_key, actor_path.read_bytes())
         print("Actor info merged successfully")
 
+    def get_written_files(self):
+        return {"Actor/ActorInfo.product.byml"}
+
     def get_checkbox_options(self):
         return []
 
@@ -4,7 +4,7 @@ import oead
 from functools import lru_cache
 from pathlib import Path
 from typing import List, Union
-from bcml import mergers, util
+from bcml import cache, mergers, util
 from bcml.util import BcmlMod
 from bcml.mergers import rstable
 
@@ -98,18 +98,14 @@ class AreaDataMerger(mergers.Merger):
         if self.is_mod_logged(mod):
             util.dict_merge(
                 diffs,
-                oead.byml.from_text(
-                    (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-                ),
+                self.read_log(mod.path / "logs"),
                 overwrite_lists=True,
             )
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diffs,
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    ),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diffs
@@ -133,16 +129,13 @@ class AreaDataMerger(mergers.Merger):
     @util.timed
     def perform_merge(self):
         merged_areadata = util.get_master_modpack_dir() / "logs" / "areadata.byml"
-        areadata_merge_log = util.get_master_modpack_dir() / "logs" / "areadata.log"
 
         print("Loading area data mods...")
         modded_areadata = self.consolidate_diffs(self.get_all_diffs())
-        areadata_mod_hash = hash(str(modded_areadata))
         if not modded_areadata:
             print("No area data merging necessary")
             if merged_areadata.exists():
                 merged_areadata.unlink()
-                areadata_merge_log.unlink()
                 try:
                     stock_areadata = util.get_nested_file_bytes(
                         (
@@ -159,24 +152,31 @@ class AreaDataMerger(mergers.Merger):
                 except FileNotFoundError:
                     pass
             return
-        if (
-            areadata_merge_log.exists()
-            and areadata_merge_log.read_text() == areadata_mod_hash
-        ):
-            print("No area data merging necessary")
-            return
-
-        new_areadata = get_stock_areadata()
-        util.dict_merge(new_areadata, modded_areadata, overwrite_lists=True)
 
-        print("Writing new area data...")
-        areadata_bytes = oead.byml.to_binary(
-            oead.byml.Array(
-                [v for _, v in sorted(new_areadata.items(), key=lambda x: int(x[0]))]
-            ),
-            big_endian=util.get_settings("wiiu"),
-        )
-        del new_areadata
+        cache_key = cache.get_key(self.NAME, modded_areadata, ["Pack/Bootup.pack"])
+        areadata_bytes = cache.load(cache_key)
+        if areadata_bytes is None:
+            new_areadata = get_stock_areadata()
+            util.dict_merge(new_areadata, modded_areadata, overwrite_lists=True)
+
+            print("Writing new area data...")
+            areadata_bytes = bytes(
+                oead.byml.to_binary(
+                    oead.byml.Array(
+                        [
+                            v
+                            for _, v in sorted(
+                                new_areadata.items(), key=lambda x: int(x[0])
+                            )
+                        ]
+                    ),
+                    big_endian=util.get_settings("wiiu"),
+                )
+            )
+            del new_areadata
+            cache.save(cache_key, areadata_bytes)
+        else:
+            print("Restoring cached area data merge...")
         util.inject_file_into_sarc(
             "Ecosystem/AreaData.sbyml",
             util.compress(areadata_bytes),
@@ -184,8 +184,7 @@ class AreaDataMerger(mergers.Merger):
             create_sarc=True,
         )
         print("Saving area data merge log...")
-        areadata_merge_log.parent.mkdir(parents=True, exist_ok=True)
-        areadata_merge_log.write_text(str(areadata_mod_hash))
+        merged_areadata.parent.mkdir(parents=True, exist_ok=True)
         merged_areadata.write_bytes(areadata_bytes)
 
         print("Updating RSTB...")
@@ -195,6 +194,9 @@ class AreaDataMerger(mergers.Merger):
         del areadata_bytes
         rstable.set_size("Ecosystem/AreaData.byml", rstb_size)
 
+    def get_written_files(self):
+        return {"Pack/Bootup.pack//Ecosystem/AreaData.byml"}
+
     def get_checkbox_options(self):
         return []
 
@@ -456,18 +456,14 @@ class ASListMerger(mergers.Merger):
     def get_mod_diff(self, mod: util.BcmlMod):
         diff = None
         if self.is_mod_logged(mod):
-            diff = ParameterIO.from_binary(
-                (mod.path / "logs" / self._log_name).read_bytes()
-            )
+            diff = self.read_log(mod.path / "logs")
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 if not diff:
                     diff = ParameterIO()
                 merge_plists(
                     diff,
-                    ParameterIO.from_binary(
-                        (opt / "logs" / self._log_name).read_bytes()
-                    ),
+                    self.read_log(opt / "logs"),
                     True,
                 )
         return diff
@@ -515,6 +511,12 @@ class ASListMerger(mergers.Merger):
             pool.join()
         print("Finished AS list merge")
 
+    def get_read_files(self):
+        return self.get_written_files()
+
+    def get_written_files(self):
+        return {"Actor/Pack/*.bactorpack", "Pack/TitleBG.pack"}
+
     def get_checkbox_options(self):
         return []
 
@@ -4,32 +4,85 @@ Provides functions to diff and merge BOTW gamedat and savedata.
 # Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
 # Licensed under GPLv3+
 # pylint: disable=unsupported-assignment-operation
+import json
+import os
+import shutil
 from functools import lru_cache
 from math import ceil
 from multiprocessing import Pool, pool
 from operator import itemgetter
 from pathlib import Path
-from typing import List, Union, Dict
+from typing import Iterable, List, Union, Dict, Optional, Set, Tuple
 
 import oead
 import xxhash
 from oead.byml import Hash
 
-from bcml import util, mergers
+from bcml import cache, stock, util, mergers
 from bcml.mergers import rstable
 from bcml.util import BcmlMod
 
 
+@lru_cache(None)
+def _hash_bootup(path: Path, size: int, mtime: int) -> str:
+    # The size and modified time are only there to make a changed file miss the cache
+    digest = xxhash.xxh64()
+    with path.open("rb") as bootup:
+        for chunk in iter(lambda: bootup.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_stock_snapshot_dir() -> Path:
+    """
+    Gets the folder holding the decompressed stock gamedata and savedata SARCs for
+    the current game dump, named by the hash of its Bootup.pack. The first call for
+    a game dump extracts them, and replaces the snapshot of any previous dump.
+    """
+    bootup = util.get_game_file("Pack/Bootup.pack")
+    stat = bootup.stat()
+    snapshot_dir = (
+        util.get_storage_dir()
+        / "cache"
+        / "gamedata"
+        / _hash_bootup(bootup, stat.st_size, stat.st_mtime_ns)
+    )
+    if snapshot_dir.exists():
+        return snapshot_dir
+    print("Extracting stock game data...")
+    tmp_dir = snapshot_dir.with_name(f"{snapshot_dir.name}.{os.getpid()}.tmp")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    bootup_sarc = oead.Sarc(util.unyaz_if_needed(bootup.read_bytes()))
+    for name in ["gamedata", "savedataformat"]:
+        (tmp_dir / f"{name}.sarc").write_bytes(
+            util.decompress(bootup_sarc.get_file(f"GameData/{name}.ssarc").data)
+        )
+    del bootup_sarc
+    try:
+        os.replace(tmp_dir, snapshot_dir)
+    except OSError:
+        # Another process finished the same snapshot first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    for old_dir in snapshot_dir.parent.iterdir():
+        if old_dir != snapshot_dir and not old_dir.name.endswith(".tmp"):
+            shutil.rmtree(old_dir, ignore_errors=True)
+    return snapshot_dir
+
+
+def get_stock_gamedata_bytes() -> bytes:
+    return bytes(stock.get_file(get_stock_snapshot_dir() / "gamedata.sarc"))
+
+
+def get_stock_savedata_bytes() -> bytes:
+    return bytes(stock.get_file(get_stock_snapshot_dir() / "savedataformat.sarc"))
+
+
 def get_stock_gamedata() -> oead.Sarc:
-    bootup = oead.Sarc(util.get_game_file("Pack/Bootup.pack").read_bytes())
-    return oead.Sarc(util.decompress(bootup.get_file("GameData/gamedata.ssarc").data))
+    return oead.Sarc(stock.get_file(get_stock_snapshot_dir() / "gamedata.sarc"))
 
 
 def get_stock_savedata() -> oead.Sarc:
-    bootup = oead.Sarc(util.get_game_file("Pack/Bootup.pack").read_bytes())
-    return oead.Sarc(
-        util.decompress(bootup.get_file("GameData/savedataformat.ssarc").data)
-    )
+    return oead.Sarc(stock.get_file(get_stock_snapshot_dir() / "savedataformat.sarc"))
 
 
 @lru_cache(None)
@@ -56,50 +109,245 @@ def consolidate_gamedata(gamedata: oead.Sarc) -> Hash:
     return data
 
 
-def diff_gamedata_type(data_type: str, mod_data: dict, stock_data: dict) -> Hash:
-    stock_entries = {entry["DataName"]: entry for entry in stock_data}
-    del stock_data
-    mod_entries = {entry["DataName"] for entry in mod_data}
-    diffs = Hash(
-        {
-            "add": Hash(
-                {
-                    entry["DataName"]: entry
-                    for entry in mod_data
-                    if (
-                        entry["DataName"] not in stock_entries
-                        or entry != stock_entries[entry["DataName"]]
-                    )
-                }
-            ),
-            "del": oead.byml.Array(
-                {entry for entry in stock_entries if entry not in mod_entries}
-            ),
+def hash_gamedata_entry(entry: Hash) -> int:
+    return xxhash.xxh64_intdigest(bytes(oead.byml.to_binary(entry, big_endian=False)))
+
+
+@lru_cache(None)
+def get_stock_gamedata_index() -> Dict[str, Dict[str, Tuple[str, int]]]:
+    """
+    Indexes every stock game data flag by data type and DataName, with the name of
+    the bgdata file it belongs to and a hash of its contents. The index is saved
+    with the stock snapshot, so it is only built once for each game dump.
+    """
+    index_path = get_stock_snapshot_dir() / "gamedata_index.json"
+    try:
+        return {
+            data_type: {name: tuple(entry) for name, entry in entries.items()}
+            for data_type, entries in json.loads(index_path.read_text("utf-8")).items()
         }
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    index: Dict[str, Dict[str, Tuple[str, int]]] = {}
+    for file in get_stock_gamedata().get_files():
+        for data_type, type_entries in oead.byml.from_binary(file.data).items():
+            index.setdefault(data_type, {}).update(
+                (entry["DataName"], (file.name, hash_gamedata_entry(entry)))
+                for entry in type_entries
+            )
+    tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(index), encoding="utf-8")
+    os.replace(tmp_path, index_path)
+    return index
+
+
+def diff_gamedata_file(data: bytes, added: Dict[str, Hash], names: Dict[str, Set[str]]):
+    """
+    Adds the new and changed flags in a modded bgdata file to `added`, and the name
+    of every flag in it to `names`. Flags are compared by the hash of their canonical
+    binary form, so the stock flags never need to be parsed.
+    """
+    index = get_stock_gamedata_index()
+    for data_type, entries in oead.byml.from_binary(data).items():
+        stock_index = index.get(data_type, {})
+        type_added = added.setdefault(data_type, Hash())
+        type_names = names.setdefault(data_type, set())
+        for entry in entries:
+            name = entry["DataName"]
+            type_names.add(name)
+            if (
+                name not in stock_index
+                or hash_gamedata_entry(entry) != stock_index[name][1]
+            ):
+                type_added[name] = entry
+
+
+def get_modded_gamedata_entries(gamedata: oead.Sarc) -> Hash:
+    stock_hashes = get_gamedata_hashes()
+    index = get_stock_gamedata_index()
+    added: Dict[str, Hash] = {}
+    names: Dict[str, Set[str]] = {}
+    unchanged = set()
+    for file in gamedata.get_files():
+        # Files identical to stock can only hold stock flags, so they are not parsed
+        if stock_hashes.get(file.name) == xxhash.xxh64_intdigest(file.data):
+            unchanged.add(file.name)
+        else:
+            diff_gamedata_file(file.data, added, names)
+    del gamedata
+    diffs = Hash()
+    for data_type, stock_index in index.items():
+        if data_type not in names and not any(
+            file in unchanged for file, _ in stock_index.values()
+        ):
+            continue
+        mod_names = names.get(data_type, set())
+        diffs[data_type] = Hash(
+            {
+                "add": added.get(data_type, Hash()),
+                "del": oead.byml.Array(
+                    {
+                        name
+                        for name, (file, _) in stock_index.items()
+                        if file not in unchanged and name not in mod_names
+                    }
+                ),
+            }
+        )
+    for data_type in {d for d in added if d not in diffs}:
+        diffs[data_type] = Hash({"add": added[data_type], "del": oead.byml.Array()})
+    return diffs
+
+
+def _get_stock_chunk_entries(
+    chunks: Iterable[Tuple[str, str, List[str], Hash]],
+) -> Dict[str, Dict[str, Hash]]:
+    """
+    Gets the stock flags needed to write some gamedata chunks, parsing only the stock
+    bgdata files which hold them
+    """
+    index = get_stock_gamedata_index()
+    wanted: Dict[str, Set[str]] = {}
+    for _, data_type, names, modded in chunks:
+        wanted.setdefault(data_type, set()).update(
+            name for name in names if name not in modded
+        )
+    files = {
+        index[data_type][name][0]
+        for data_type, names in wanted.items()
+        for name in names
+    }
+    entries: Dict[str, Dict[str, Hash]] = {}
+    for file in get_stock_gamedata().get_files():
+        if file.name not in files:
+            continue
+        for data_type, type_entries in oead.byml.from_binary(file.data).items():
+            if data_type in wanted:
+                entries.setdefault(data_type, {}).update(
+                    (entry["DataName"], entry)
+                    for entry in type_entries
+                    if entry["DataName"] in wanted[data_type]
+                )
+    return entries
+
+
+def _write_gamedata_chunk(
+    chunk: Tuple[str, str, List[str], Hash], stock_entries: Dict[str, Dict[str, Hash]]
+) -> Tuple[str, bytes]:
+    file_name, data_type, names, modded = chunk
+    type_entries = stock_entries.get(data_type, {})
+    entries = oead.byml.Array(
+        [modded[name] if name in modded else type_entries[name] for name in names]
+    )
+    return (
+        file_name,
+        bytes(
+            oead.byml.to_binary(
+                Hash({data_type: entries}), big_endian=util.get_settings("wiiu")
+            )
+        ),
     )
-    del stock_entries
-    del mod_entries
-    del mod_data
-    return Hash({data_type: diffs})
 
 
-def get_modded_gamedata_entries(gamedata: oead.Sarc, pool: pool.Pool = None) -> Hash:
-    this_pool = pool or util.start_pool()
-    stock_data = consolidate_gamedata(get_stock_gamedata())
-    mod_data = consolidate_gamedata(gamedata)
-    del gamedata
-    results = this_pool.starmap(
-        diff_gamedata_type,
-        ((key, mod_data[key], stock_data[key]) for key in mod_data),
+def _get_previous_chunks(
+    sarc_path: Path, chunk_hashes: Dict[str, str]
+) -> Dict[str, bytes]:
+    """
+    Gets the files of a previously merged SARC whose recorded content hashes match the
+    hashes of the files about to be written
+    """
+    hash_path = sarc_path.with_name(f"{sarc_path.stem}_chunks.json")
+    try:
+        old_hashes = json.loads(hash_path.read_text("utf-8"))
+        old_sarc = oead.Sarc(sarc_path.read_bytes())
+    except (
+        FileNotFoundError,
+        json.JSONDecodeError,
+        RuntimeError,
+        ValueError,
+        oead.InvalidDataError,
+    ):
+        return {}
+    chunks = {}
+    for file in old_sarc.get_files():
+        if (
+            file.name in chunk_hashes
+            and old_hashes.get(file.name) == chunk_hashes[file.name]
+        ):
+            chunks[file.name] = bytes(file.data)
+    return chunks
+
+
+def _encode_cached_merge(merged: bytes, chunk_hashes: Dict[str, str]) -> bytes:
+    hashes = json.dumps(chunk_hashes).encode("utf-8")
+    return len(hashes).to_bytes(4, "little") + hashes + merged
+
+
+def _decode_cached_merge(data: bytes) -> Optional[Tuple[bytes, Dict[str, str]]]:
+    size = int.from_bytes(data[0:4], "little")
+    try:
+        chunk_hashes = json.loads(data[4 : 4 + size].decode("utf-8"))
+    except ValueError:
+        return None
+    if not isinstance(chunk_hashes, dict):
+        return None
+    return data[4 + size :], chunk_hashes
+
+
+def merge_gamedata_chunks(
+    modded_entries: Hash, sarc_path: Path
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Builds a merged gamedata SARC in chunks of 4096 flags per data type. Chunks whose
+    contents have not changed since the last merge are copied from it, and the rest
+    are serialized from only the stock flags they hold. Returns the SARC with the
+    content hash of each chunk.
+    """
+    stock_index = get_stock_gamedata_index()
+    wiiu = util.get_settings("wiiu")
+    chunks: Dict[str, Tuple[str, str, List[str], Hash]] = {}
+    chunk_hashes: Dict[str, str] = {}
+    for data_type, stock_entries in stock_index.items():
+        added = (
+            modded_entries[data_type]["add"] if data_type in modded_entries else Hash()
+        )
+        deleted = (
+            set(modded_entries[data_type]["del"])
+            if data_type in modded_entries
+            else set()
+        )
+        names = sorted((set(stock_entries) | set(added.keys())) - deleted)
+        for i in range(ceil(len(names) / 4096)):
+            file_name = f"/{data_type}_{i}.bgdata"
+            chunk_names = names[i * 4096 : (i + 1) * 4096]
+            chunk_added = Hash(
+                {name: added[name] for name in chunk_names if name in added}
+            )
+            digest = xxhash.xxh64(f"{data_type}:{wiiu}".encode("utf-8"))
+            for name in chunk_names:
+                entry_hash = (
+                    hash_gamedata_entry(chunk_added[name])
+                    if name in chunk_added
+                    else stock_entries[name][1]
+                )
+                digest.update(f"{name}:{entry_hash}\0".encode("utf-8"))
+            chunk_hashes[file_name] = digest.hexdigest()
+            chunks[file_name] = (file_name, data_type, chunk_names, chunk_added)
+
+    new_gamedata = oead.SarcWriter(
+        endian=oead.Endianness.Big if wiiu else oead.Endianness.Little
     )
-    diffs = Hash({data_type: diff for d in results for data_type, diff in d.items()})
-    del results
-    if not pool:
-        this_pool.close()
-        this_pool.join()
-    del stock_data
-    del mod_data
-    return diffs
+    reused = _get_previous_chunks(sarc_path, chunk_hashes)
+    for file_name, data in reused.items():
+        new_gamedata.files[file_name] = data
+    util.vprint(f"Reusing {len(reused)} of {len(chunks)} gamedata chunks")
+    changed = [chunk for file_name, chunk in chunks.items() if file_name not in reused]
+    if changed:
+        stock_entries = _get_stock_chunk_entries(changed)
+        for chunk in changed:
+            file_name, data = _write_gamedata_chunk(chunk, stock_entries)
+            new_gamedata.files[file_name] = data
+    return new_gamedata.write()[1], chunk_hashes
 
 
 def get_modded_savedata_entries(savedata: oead.Sarc) -> Hash:
@@ -157,7 +405,7 @@ class GameDataMerger(mergers.Merger):
             data_sarc = oead.Sarc(
                 util.decompress(bootup_sarc.get_file("GameData/gamedata.ssarc").data)
             )
-            diff = get_modded_gamedata_entries(data_sarc, pool=self._pool)
+            diff = get_modded_gamedata_entries(data_sarc)
             del bootup_sarc
             del data_sarc
             return diff
@@ -178,18 +426,14 @@ class GameDataMerger(mergers.Merger):
         if self.is_mod_logged(mod):
             util.dict_merge(
                 diffs,
-                oead.byml.from_text(
-                    (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-                ),
+                self.read_log(mod.path / "logs"),
                 overwrite_lists=True,
             )
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diffs,
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    ),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diffs
@@ -220,77 +464,52 @@ class GameDataMerger(mergers.Merger):
     @util.timed
     def perform_merge(self):
         force = self._options.get("force", False)
-        glog_path = util.get_master_modpack_dir() / "logs" / "gamedata.log"
 
         modded_entries = self.consolidate_diffs(self.get_all_diffs())
+        merged_sarc = util.get_master_modpack_dir() / "logs" / "gamedata.sarc"
+        chunk_log = merged_sarc.with_name("gamedata_chunks.json")
         if not modded_entries:
             print("No gamedata merging necessary.")
-            if glog_path.exists():
-                glog_path.unlink()
-            if (util.get_master_modpack_dir() / "logs" / "gamedata.sarc").exists():
-                (util.get_master_modpack_dir() / "logs" / "gamedata.sarc").unlink()
+            if chunk_log.exists():
+                chunk_log.unlink()
+            if merged_sarc.exists():
+                merged_sarc.unlink()
+                try:
+                    util.inject_file_into_sarc(
+                        "GameData/gamedata.ssarc",
+                        util.compress(get_stock_gamedata_bytes()),
+                        "Pack/Bootup.pack",
+                    )
+                except FileNotFoundError:
+                    pass
             return
-        if glog_path.exists() and not force:
-            with glog_path.open("r") as l_file:
-                if xxhash.xxh64_hexdigest(str(modded_entries)) == l_file.read():
-                    print("No gamedata merging necessary.")
-                    return
-
-        print("Loading stock gamedata...")
-        gamedata = consolidate_gamedata(get_stock_gamedata())
-        merged_entries = {
-            data_type: Hash({entry["DataName"]: entry for entry in entries})
-            for data_type, entries in gamedata.items()
-        }
-        del gamedata
-
-        print("Merging changes...")
-        for data_type in {d for d in merged_entries if d in modded_entries}:
-            util.dict_merge(
-                merged_entries[data_type],
-                modded_entries[data_type]["add"],
-                shallow=True,
+        cache_key = cache.get_key(self.NAME, modded_entries, ["Pack/Bootup.pack"])
+        cached = None if force else cache.load(cache_key)
+        cached = _decode_cached_merge(cached) if cached is not None else None
+        if cached is None:
+            print("Merging changes and creating new gamedata.sarc...")
+            new_gamedata_bytes, chunk_hashes = merge_gamedata_chunks(
+                modded_entries, merged_sarc
             )
-            for entry in modded_entries[data_type]["del"]:
-                try:
-                    del merged_entries[data_type][entry]
-                except KeyError:
-                    continue
-
-        merged_entries = Hash(
-            {
-                data_type: oead.byml.Array([value for _, value in entries.items()])
-                for data_type, entries in merged_entries.items()
-            }
-        )
-        print("Creating and injecting new gamedata.sarc...")
-        new_gamedata = oead.SarcWriter(
-            endian=oead.Endianness.Big
-            if util.get_settings("wiiu")
-            else oead.Endianness.Little
-        )
-        for data_type in merged_entries:
-            num_files = ceil(len(merged_entries[data_type]) / 4096)
-            for i in range(num_files):
-                end_pos = (i + 1) * 4096
-                if end_pos > len(merged_entries[data_type]):
-                    end_pos = len(merged_entries[data_type])
-                new_gamedata.files[f"/{data_type}_{i}.bgdata"] = oead.byml.to_binary(
-                    Hash({data_type: merged_entries[data_type][i * 4096 : end_pos]}),
-                    big_endian=util.get_settings("wiiu"),
-                )
-        new_gamedata_bytes = new_gamedata.write()[1]
-        del new_gamedata
+            cache.save(
+                cache_key, _encode_cached_merge(new_gamedata_bytes, chunk_hashes)
+            )
+        else:
+            print("Restoring cached gamedata merge...")
+            new_gamedata_bytes, chunk_hashes = cached
         util.inject_file_into_sarc(
             "GameData/gamedata.ssarc",
             util.compress(new_gamedata_bytes),
             "Pack/Bootup.pack",
             create_sarc=True,
         )
-        (util.get_master_modpack_dir() / "logs").mkdir(parents=True, exist_ok=True)
-        (util.get_master_modpack_dir() / "logs" / "gamedata.sarc").write_bytes(
-            new_gamedata_bytes
-        )
+        merged_sarc.parent.mkdir(parents=True, exist_ok=True)
+        # The chunk hashes must never be left describing a different merged SARC
+        if chunk_log.exists():
+            chunk_log.unlink()
+        merged_sarc.write_bytes(new_gamedata_bytes)
+        if chunk_hashes:
+            chunk_log.write_text(json.dumps(chunk_hashes), encoding="utf-8")
 
         print("Updating RSTB...")
         rstable.set_size(
@@ -299,12 +518,11 @@ class GameDataMerger(mergers.Merger):
         )
         del new_gamedata_bytes
 
-        glog_path.parent.mkdir(parents=True, exist_ok=True)
-        with glog_path.open("w", encoding="utf-8") as l_file:
-            l_file.write(xxhash.xxh64_hexdigest(str(modded_entries)))
+    def get_written_files(self):
+        return {"Pack/Bootup.pack//GameData/gamedata.sarc"}
 
     def get_checkbox_options(self):
-        return [("force", "Remerge game data even if no changes detected")]
+        return [("force", "Remerge game data even if a cached merge exists")]
 
     @staticmethod
     def is_bootup_injector():
@@ -364,18 +582,10 @@ class SaveDataMerger(mergers.Merger):
     def get_mod_diff(self, mod: BcmlMod):
         diffs = []
         if self.is_mod_logged(mod):
-            diffs.append(
-                oead.byml.from_text(
-                    (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-                )
-            )
+            diffs.append(self.read_log(mod.path / "logs"))
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
-                diffs.append(
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    )
-                )
+                diffs.append(self.read_log(opt / "logs"))
         return diffs
 
     def get_all_diffs(self):
@@ -405,94 +615,99 @@ class SaveDataMerger(mergers.Merger):
     @util.timed
     def perform_merge(self):
         force = self._options.get("force", False)
-        slog_path = util.get_master_modpack_dir() / "logs" / "savedata.log"
 
         new_entries = self.consolidate_diffs(self.get_all_diffs())
         if not new_entries:
             print("No savedata merging necessary.")
-            if slog_path.exists():
-                slog_path.unlink()
             if (util.get_master_modpack_dir() / "logs" / "savedata.sarc").exists():
                 (util.get_master_modpack_dir() / "logs" / "savedata.sarc").unlink()
+                try:
+                    util.inject_file_into_sarc(
+                        "GameData/savedataformat.ssarc",
+                        util.compress(get_stock_savedata_bytes()),
+                        "Pack/Bootup.pack",
+                    )
+                except FileNotFoundError:
+                    pass
             return
-        if slog_path.exists() and not force:
-            with slog_path.open("r") as l_file:
-                if xxhash.xxh64_hexdigest(str(new_entries)) == l_file.read():
-                    print("No savedata merging necessary.")
-                    return
-
-        savedata = get_stock_savedata()
-        save_files = sorted(savedata.get_files(), key=lambda f: f.name)[0:-2]
-        del_ids = {item.v for item in new_entries["del"]}
-
-        print("Merging changes...")
-        merged_entries = oead.byml.Array(
-            sorted(
-                {
-                    entry["HashValue"].v: entry
-                    for entry in [
-                        *[
-                            e
-                            for file in save_files
-                            for e in oead.byml.from_binary(file.data)["file_list"][1]
-                        ],
-                        *new_entries["add"],
-                    ]
-                    if entry["HashValue"].v not in del_ids
-                }.values(),
-                key=itemgetter("HashValue"),
-            )
-        )
-        print("Creating and injecting new savedataformat.sarc...")
-        new_savedata = oead.SarcWriter(
-            endian=oead.Endianness.Big
-            if util.get_settings("wiiu")
-            else oead.Endianness.Little
-        )
-        num_files = ceil(len(merged_entries) / 8192)
-        for i in range(num_files):
-            end_pos = (i + 1) * 8192
-            if end_pos > len(merged_entries):
-                end_pos = len(merged_entries)
-            data = oead.byml.to_binary(
-                Hash(
+        cache_key = cache.get_key(self.NAME, new_entries, ["Pack/Bootup.pack"])
+        new_save_bytes = None if force else cache.load(cache_key)
+        if new_save_bytes is None:
+            savedata = get_stock_savedata()
+            save_files = sorted(savedata.get_files(), key=lambda f: f.name)[0:-2]
+            del_ids = {item.v for item in new_entries["del"]}
+
+            print("Merging changes...")
+            merged_entries = oead.byml.Array(
+                sorted(
                     {
-                        "file_list": oead.byml.Array(
-                            [
-                                {
-                                    "IsCommon": False,
-                                    "IsCommonAtSameAccount": False,
-                                    "IsSaveSecureCode": True,
-                                    "file_name": "game_data.sav",
-                                },
-                                oead.byml.Array(merged_entries[i * 8192 : end_pos]),
-                            ]
-                        ),
-                        "save_info": oead.byml.Array(
-                            [
-                                {
-                                    "directory_num": oead.S32(8),
-                                    "is_build_machine": True,
-                                    "revision": oead.S32(18203),
-                                }
-                            ]
-                        ),
-                    }
-                ),
-                big_endian=util.get_settings("wiiu"),
+                        entry["HashValue"].v: entry
+                        for entry in [
+                            *[
+                                e
+                                for file in save_files
+                                for e in oead.byml.from_binary(file.data)["file_list"][1]
+                            ],
+                            *new_entries["add"],
+                        ]
+                        if entry["HashValue"].v not in del_ids
+                    }.values(),
+                    key=itemgetter("HashValue"),
+                )
+            )
+            print("Creating and injecting new savedataformat.sarc...")
+            new_savedata = oead.SarcWriter(
+                endian=oead.Endianness.Big
+                if util.get_settings("wiiu")
+                else oead.Endianness.Little
             )
-            new_savedata.files[f"/saveformat_{i}.bgsvdata"] = data
+            num_files = ceil(len(merged_entries) / 8192)
+            for i in range(num_files):
+                end_pos = (i + 1) * 8192
+                if end_pos > len(merged_entries):
+                    end_pos = len(merged_entries)
+                data = oead.byml.to_binary(
+                    Hash(
+                        {
+                            "file_list": oead.byml.Array(
+                                [
+                                    {
+                                        "IsCommon": False,
+                                        "IsCommonAtSameAccount": False,
+                                        "IsSaveSecureCode": True,
+                                        "file_name": "game_data.sav",
+                                    },
+                                    oead.byml.Array(merged_entries[i * 8192 : end_pos]),
+                                ]
+                            ),
+                            "save_info": oead.byml.Array(
+                                [
+                                    {
+                                        "directory_num": oead.S32(8),
+                                        "is_build_machine": True,
+                                        "revision": oead.S32(18203),
+                                    }
+                                ]
+                            ),
+                        }
+                    ),
+                    big_endian=util.get_settings("wiiu"),
+                )
+                new_savedata.files[f"/saveformat_{i}.bgsvdata"] = data
 
-        new_savedata.files[f"/saveformat_{num_files}.bgsvdata"] = oead.Bytes(
-            savedata.get_file("/saveformat_6.bgsvdata").data
-        )
-        new_savedata.files[f"/saveformat_{num_files + 1}.bgsvdata"] = oead.Bytes(
-            savedata.get_file("/saveformat_7.bgsvdata").data
-        )
+            new_savedata.files[f"/saveformat_{num_files}.bgsvdata"] = oead.Bytes(
+                savedata.get_file("/saveformat_6.bgsvdata").data
+            )
+            new_savedata.files[f"/saveformat_{num_files + 1}.bgsvdata"] = oead.Bytes(
+                savedata.get_file("/saveformat_7.bgsvdata").data
+            )
 
-        del savedata
-        new_save_bytes = new_savedata.write()[1]
-        del new_savedata
+            del savedata
+            new_save_bytes = new_savedata.write()[1]
+            del new_savedata
+            cache.save(cache_key, new_save_bytes)
+        else:
+            print("Restoring cached savedata merge...")
         util.inject_file_into_sarc(
             "GameData/savedataformat.ssarc",
             util.compress(new_save_bytes),
@@ -513,12 +728,11 @@ class SaveDataMerger(mergers.Merger):
         )
         del new_save_bytes
 
-        slog_path.parent.mkdir(parents=True, exist_ok=True)
-        with slog_path.open("w", encoding="utf-8") as l_file:
-            l_file.write(xxhash.xxh64_hexdigest(str(new_entries)))
+    def get_written_files(self):
+        return {"Pack/Bootup.pack//GameData/savedataformat.sarc"}
 
     def get_checkbox_options(self):
-        return [("force", "Remerge save data even if no changes detected")]
+        return [("force", "Remerge save data even if a cached merge exists")]
 
     @staticmethod
     def is_bootup_injector():
@@ -190,7 +190,7 @@ class DropMerger(mergers.Merger):
 
         diff: Dict[str, dict] = {}
         if self.is_mod_logged(mod):
-            data = json.loads((mod.path / "logs" / self._log_name).read_text("utf-8"))
+            data = self.read_log(mod.path / "logs")
             rem_underride(data)
             util.dict_merge(
                 diff,
@@ -198,7 +198,7 @@ class DropMerger(mergers.Merger):
             )
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
-                data = json.loads((opt / "logs" / self._log_name).read_text("utf-8"))
+                data = self.read_log(opt / "logs")
                 rem_underride(data)
                 util.dict_merge(diff, data)
         return diff
@@ -238,5 +238,11 @@ class DropMerger(mergers.Merger):
     def get_mod_edit_info(self, mod: util.BcmlMod):
         return set(self.get_mod_diff(mod).keys())
 
+    def get_read_files(self):
+        return self.get_written_files()
+
+    def get_written_files(self):
+        return {"Actor/Pack/*.bactorpack", "Pack/TitleBG.pack"}
+
     def get_checkbox_options(self):
         return []
@@ -3,7 +3,7 @@ from typing import List, Union
 
 import oead
 import rstb
-from bcml import util, mergers
+from bcml import cache, util, mergers
 from bcml.mergers import rstable
 
 
@@ -59,16 +59,12 @@ class StatusEffectMerger(mergers.Merger):
     def get_mod_diff(self, mod: util.BcmlMod):
         diff = oead.byml.Hash()
         if self.is_mod_logged(mod):
-            diff = oead.byml.from_text(
-                (mod.path / "logs" / self._log_name).read_text("utf-8")
-            )
+            diff = self.read_log(mod.path / "logs")
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diff,
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    ),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diff
@@ -117,15 +113,23 @@ class StatusEffectMerger(mergers.Merger):
                     pass
             return
 
-        effects = get_stock_effects()
-        util.dict_merge(effects, diffs, overwrite_lists=True)
-        del diffs
+        cache_key = cache.get_key(self.NAME, diffs, ["Pack/Bootup.pack"])
+        effect_bytes = cache.load(cache_key)
+        if effect_bytes is None:
+            effects = get_stock_effects()
+            util.dict_merge(effects, diffs, overwrite_lists=True)
 
-        print("Writing new effects list...")
-        effect_bytes = oead.byml.to_binary(
-            oead.byml.Array([effects]), big_endian=util.get_settings("wiiu")
-        )
-        del effects
+            print("Writing new effects list...")
+            effect_bytes = bytes(
+                oead.byml.to_binary(
+                    oead.byml.Array([effects]), big_endian=util.get_settings("wiiu")
+                )
+            )
+            del effects
+            cache.save(cache_key, effect_bytes)
+        else:
+            print("Restoring cached status effect merge...")
+        del diffs
         util.inject_file_into_sarc(
             "Ecosystem/StatusEffectList.sbyml",
             util.compress(effect_bytes),
@@ -143,6 +147,9 @@ class StatusEffectMerger(mergers.Merger):
         del effect_bytes
         rstable.set_size("Ecosystem/StatusEffectList.byml", rstb_size)
 
+    def get_written_files(self):
+        return {"Pack/Bootup.pack//Ecosystem/StatusEffectList.byml"}
+
     def get_checkbox_options(self):
         return []
 
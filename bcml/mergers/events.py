@@ -6,7 +6,7 @@ from typing import List, Union
 
 import oead
 import rstb
-from bcml import util, mergers
+from bcml import cache, util, mergers
 from bcml.util import BcmlMod
 from bcml.mergers import rstable
 
@@ -84,18 +84,14 @@ class EventInfoMerger(mergers.Merger):
         if self.is_mod_logged(mod):
             util.dict_merge(
                 diffs,
-                oead.byml.from_text(
-                    (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-                ),
+                self.read_log(mod.path / "logs"),
                 overwrite_lists=True,
             )
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diffs,
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    ),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diffs
@@ -119,16 +115,13 @@ class EventInfoMerger(mergers.Merger):
     @util.timed
     def perform_merge(self):
         merged_events = util.get_master_modpack_dir() / "logs" / "eventinfo.byml"
-        event_merge_log = util.get_master_modpack_dir() / "logs" / "eventinfo.log"
 
         print("Loading event info mods...")
         modded_events = self.consolidate_diffs(self.get_all_diffs())
-        event_mod_hash = hash(str(modded_events))
         if not modded_events:
             print("No event info merging necessary")
             if merged_events.exists():
                 merged_events.unlink()
-                event_merge_log.unlink()
                 try:
                     stock_eventinfo = util.get_nested_file_bytes(
                         (
@@ -145,20 +138,23 @@ class EventInfoMerger(mergers.Merger):
                 except FileNotFoundError:
                     pass
             return
-        if event_merge_log.exists() and event_merge_log.read_text() == event_mod_hash:
-            print("No event info merging necessary")
-            return
 
-        new_events = get_stock_eventinfo()
-        for event, data in modded_events.items():
-            new_events[event] = data
-        del modded_events
+        cache_key = cache.get_key(self.NAME, modded_events, ["Pack/Bootup.pack"])
+        event_bytes = cache.load(cache_key)
+        if event_bytes is None:
+            new_events = get_stock_eventinfo()
+            for event, data in modded_events.items():
+                new_events[event] = data
 
-        print("Writing new event info...")
-        event_bytes = oead.byml.to_binary(
-            new_events, big_endian=util.get_settings("wiiu")
-        )
-        del new_events
+            print("Writing new event info...")
+            event_bytes = bytes(
+                oead.byml.to_binary(new_events, big_endian=util.get_settings("wiiu"))
+            )
+            del new_events
+            cache.save(cache_key, event_bytes)
+        else:
+            print("Restoring cached event info merge...")
+        del modded_events
         util.inject_file_into_sarc(
             "Event/EventInfo.product.sbyml",
             util.compress(event_bytes),
@@ -166,8 +162,7 @@ class EventInfoMerger(mergers.Merger):
             create_sarc=True,
         )
         print("Saving event info merge log...")
-        event_merge_log.parent.mkdir(parents=True, exist_ok=True)
-        event_merge_log.write_text(str(event_mod_hash))
+        merged_events.parent.mkdir(parents=True, exist_ok=True)
         merged_events.write_bytes(event_bytes)
 
         print("Updating RSTB...")
@@ -177,6 +172,9 @@ class EventInfoMerger(mergers.Merger):
         del event_bytes
         rstable.set_size("Event/EventInfo.product.byml", rstb_size)
 
+    def get_written_files(self):
+        return {"Pack/Bootup.pack//Event/EventInfo.product.byml"}
+
     def get_checkbox_options(self):
         return []
 
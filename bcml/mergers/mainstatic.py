@@ -127,16 +127,12 @@ class MainfieldStaticMerger(mergers.Merger):
     def get_mod_diff(self, mod: util.BcmlMod):
         diff = oead.byml.Hash()
         if self.is_mod_logged(mod):
-            diff = oead.byml.from_text(
-                (mod.path / "logs" / self._log_name).read_text("utf-8")
-            )
+            diff = self.read_log(mod.path / "logs")
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diff,
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    ),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diff
@@ -183,10 +179,17 @@ class MainfieldStaticMerger(mergers.Merger):
                 unyaz=False,
             )
         if not diffs:
-            try:
+            if output.exists():
                 output.unlink()
-            except:
-                pass
+                if "mainstatic" in str(output):
+                    try:
+                        util.inject_file_into_sarc(
+                            "Map/MainField/Static.smubin",
+                            static_data,
+                            "Pack/Bootup.pack",
+                        )
+                    except FileNotFoundError:
+                        pass
             return
         stock_static = oead.byml.from_binary(util.decompress(static_data))
         merged = Hash()
@@ -212,6 +215,12 @@ class MainfieldStaticMerger(mergers.Merger):
                 create_sarc=True,
             )
 
+    def get_written_files(self):
+        return {
+            "Aoc/0010/Map/MainField/Static.mubin",
+            "Pack/Bootup.pack//Map/MainField/Static.mubin",
+        }
+
     def get_checkbox_options(self):
         return []
 
@@ -5,14 +5,14 @@ from typing import Union, List, ByteString, Optional, Dict, Any
 
 from oead.aamp import ParameterIO, ParameterList, ParameterObject, Parameter
 from oead import Sarc, SarcWriter, InvalidDataError
-from bcml import util, mergers
+from bcml import stock, util, mergers
 
 HANDLED = {".bdrop", ".bshop", ".baslist"}
 
 
 def get_aamp_diffs(file: str, tree: Union[dict, list], tmp_dir: Path) -> Optional[dict]:
     try:
-        ref_sarc = Sarc(util.unyaz_if_needed(util.get_game_file(file).read_bytes()))
+        ref_sarc = Sarc(stock.get_game_file(file))
     except (FileNotFoundError, InvalidDataError, ValueError, RuntimeError) as err:
         util.vprint(f"{file} ignored on stock side, cuz {err}")
         return None
@@ -257,14 +257,14 @@ class DeepMerger(mergers.Merger):
     def get_mod_diff(self, mod: util.BcmlMod):
         diff = None
         if self.is_mod_logged(mod):
-            diff = self.read_diff(mod.path / "logs" / self._log_name)
+            diff = self.read_log(mod.path / "logs")
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 if not diff:
                     diff = ParameterIO()
                 merge_plists(
                     diff,
-                    self.read_diff(opt / "logs" / self._log_name),
+                    self.read_log(opt / "logs"),
                     True,
                 )
         return diff
@@ -312,11 +312,16 @@ class DeepMerger(mergers.Merger):
             pool.join()
         print("Finished deep merge")
 
+    def get_read_files(self):
+        return self.get_written_files()
+
+    def get_written_files(self):
+        return {
+            f"*{ext.replace('.s', '.')}" for ext in util.SARC_EXTS | util.AAMP_EXTS
+        }
+
     def get_checkbox_options(self):
         return []
 
     def get_mod_edit_info(self, mod: util.BcmlMod):
-        diff = self.get_mod_diff(mod)
-        if not diff:
-            return set()
-        return set(file.v for _, file in diff.objects["FileTable"].params.items())
+        return self.get_mod_log_files(mod)
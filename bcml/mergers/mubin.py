@@ -2,12 +2,15 @@
 # Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
 # Licensed under GPLv3+
 import multiprocessing
+import os
 import shutil
 from collections import namedtuple
 from functools import partial
+from itertools import count, islice
 from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from typing import Dict, Union, List, Tuple
+from typing import Dict, Iterable, Iterator, Union, List, Set, Tuple
 from zlib import crc32
 
 import oead
@@ -16,7 +19,7 @@ import rstb
 import rstb.util
 
 from bcml import bcml as rsext
-from bcml import util, mergers
+from bcml import cache, difflog, stock, util, mergers
 
 Map = namedtuple("Map", "section type")
 
@@ -58,9 +61,7 @@ def get_stock_map(map_unit: Union[Map, tuple], force_vanilla: bool = False) -> H
             map_bytes = map_path.read_bytes()
         except FileNotFoundError:
             try:
-                title_pack = oead.Sarc(
-                    util.get_game_file("Pack/TitleBG.pack").read_bytes()
-                )
+                title_pack = oead.Sarc(stock.get_game_file("Pack/TitleBG.pack"))
                 map_bytes = title_pack.get_file(
                     f"Map/MainField/{map_unit.section}/{map_unit.section}_{map_unit.type}"
                     ".smubin"
@@ -71,7 +72,7 @@ def get_stock_map(map_unit: Union[Map, tuple], force_vanilla: bool = False) -> H
         if (aoc_dir / "Pack" / "AocMainField.pack").exists():
             try:
                 map_pack = oead.Sarc(
-                    (aoc_dir / "Pack" / "AocMainField.pack").read_bytes()
+                    stock.get_file(aoc_dir / "Pack" / "AocMainField.pack")
                 )
                 map_bytes = map_pack.get_file(
                     f"Map/MainField/{map_unit.section}/{map_unit.section}_{map_unit.type}"
@@ -89,7 +90,7 @@ def get_stock_map(map_unit: Union[Map, tuple], force_vanilla: bool = False) -> H
                 except FileNotFoundError:
                     try:
                         title_pack = oead.Sarc(
-                            util.get_game_file("Pack/TitleBG.pack").read_bytes()
+                            stock.get_game_file("Pack/TitleBG.pack")
                         )
                         map_bytes = bytes(
                             title_pack.get_file(
@@ -107,7 +108,7 @@ def get_stock_map(map_unit: Union[Map, tuple], force_vanilla: bool = False) -> H
     return oead.byml.from_binary(map_bytes)
 
 
-def get_modded_map(map_unit: Union[Map, tuple], tmp_dir: Path) -> Hash:
+def get_modded_map_bytes(map_unit: Union[Map, tuple], tmp_dir: Path) -> bytes:
     if isinstance(map_unit, tuple):
         map_unit = Map(*map_unit)
     map_bytes = None
@@ -171,44 +172,80 @@ def get_modded_map(map_unit: Union[Map, tuple], tmp_dir: Path) -> Hash:
             f"Oddly, the modded map {map_unit.section}_{map_unit.type}.smubin "
             "could not be found."
         )
-    map_bytes = util.decompress(map_bytes)
-    return oead.byml.from_binary(map_bytes)
+    return bytes(util.decompress(map_bytes))
+
+
+def get_modded_map(map_unit: Union[Map, tuple], tmp_dir: Path) -> Hash:
+    return oead.byml.from_binary(get_modded_map_bytes(map_unit, tmp_dir))
 
 
-def get_map_diff(map_unit: Map, tmp_dir: Path, new_hashes: bool = False) -> Hash:
-    mod_map = get_modded_map(map_unit, tmp_dir)
-    stock_map = True
-    for obj in mod_map["Objs"]:
-        str_obj = oead.byml.to_text(obj)
-        if "IsHardModeActor" in str_obj or "AoC_HardMode_Enabled" in str_obj:
-            stock_map = False
-            break
+def get_map_diff_key(map_unit: Map, map_bytes: bytes, new_hashes: bool) -> str:
+    """
+    Gets the cache key for the diff of a modded map unit, which depends only on the
+    modded unit, the stock files it could be compared with, and the hash option
+    """
+    unit_path = (
+        f"Map/MainField/{map_unit.section}/{map_unit.section}_{map_unit.type}.smubin"
+    )
+    return cache.get_key(
+        "mapdiff",
+        map_bytes,
+        ["Pack/TitleBG.pack", unit_path],
+        cache.get_stock_version("Pack/AocMainField.pack", aoc=True),
+        cache.get_stock_version(unit_path, aoc=True),
+        "_".join(map_unit),
+        f"new_hashes={new_hashes}",
+    )
+
+
+HARD_MODE_KEYS = {"IsHardModeActor", "AoC_HardMode_Enabled"}
+
+
+def _is_hard_mode_obj(obj: Hash) -> bool:
+    if any(key in obj for key in HARD_MODE_KEYS):
+        return True
+    if "!Parameters" not in obj or not isinstance(obj["!Parameters"], Hash):
+        return False
+    return any(key in obj["!Parameters"] for key in HARD_MODE_KEYS)
+
+
+def _diff_by_hash(base_items: Array, mod_items: Array) -> Hash:
+    base_index = {int(item["HashId"]): item for item in base_items}
+    mod_hashes = set()
+    added = Array()
+    modified = Hash()
+    for item in mod_items:
+        hash_id = int(item["HashId"])
+        mod_hashes.add(hash_id)
+        base_item = base_index.get(hash_id)
+        if base_item is None:
+            added.append(item)
+        elif item != base_item:
+            modified[str(item["HashId"])] = item
+    return Hash(
+        {
+            "add": added,
+            "mod": modified,
+            "del": Array([oead.U32(h) for h in base_index if h not in mod_hashes]),
+        }
+    )
+
+
+def get_map_diff(
+    map_unit: Map, tmp_dir: Path, new_hashes: bool = False
+) -> Tuple[str, bytes]:
+    map_bytes = get_modded_map_bytes(map_unit, tmp_dir)
+    key = get_map_diff_key(map_unit, map_bytes, new_hashes)
+    cached = cache.load(key)
+    if cached is not None:
+        return "_".join(map_unit), cached
+    mod_map = oead.byml.from_binary(map_bytes)
+    del map_bytes
+    stock_map = not any(_is_hard_mode_obj(obj) for obj in mod_map["Objs"])
     base_map = get_stock_map(map_unit, force_vanilla=stock_map)
 
     def diff_objs() -> Hash:
-        base_hashes = [int(obj["HashId"]) for obj in base_map["Objs"]]
-        mod_hashes = [int(obj["HashId"]) for obj in mod_map["Objs"]]
-
-        diffs = Hash()
-        diffs["add"] = Array(
-            [obj for obj in mod_map["Objs"] if int(obj["HashId"]) not in base_hashes]
-        )
-        diffs["mod"] = Hash(
-            {
-                str(obj["HashId"]): obj
-                for obj in mod_map["Objs"]
-                if int(obj["HashId"]) in base_hashes
-                and obj != base_map["Objs"][base_hashes.index(int(obj["HashId"]))]
-            }
-        )
-        diffs["del"] = Array(
-            [
-                oead.U32(h)
-                for h in {
-                    hash_id for hash_id in base_hashes if hash_id not in mod_hashes
-                }
-            ]
-        )
+        diffs = _diff_by_hash(base_map["Objs"], mod_map["Objs"])
 
         if new_hashes:
             hash_map: Dict[int, int] = {}
@@ -226,46 +263,22 @@ def get_map_diff(map_unit: Map, tmp_dir: Path, new_hashes: bool = False) -> Hash
         return diffs
 
     def diff_rails() -> Hash:
-        base_hashes = [int(rail["HashId"]) for rail in base_map["Rails"]]
-        mod_hashes = [int(rail["HashId"]) for rail in mod_map["Rails"]]
-
-        diffs = Hash()
-        diffs["add"] = Array(
-            [
-                rail
-                for rail in mod_map["Rails"]
-                if int(rail["HashId"]) not in base_hashes
-            ]
-        )
-        diffs["mod"] = Hash(
-            {
-                str(rail["HashId"]): rail
-                for rail in mod_map["Rails"]
-                if int(rail["HashId"]) in base_hashes
-                and rail != base_map["Rails"][base_hashes.index(int(rail["HashId"]))]
-            }
-        )
-        diffs["del"] = Array(
-            [
-                oead.U32(h)
-                for h in {
-                    hash_id for hash_id in base_hashes if hash_id not in mod_hashes
-                }
-            ]
-        )
-        return diffs
+        return _diff_by_hash(base_map["Rails"], mod_map["Rails"])
 
-    return (
-        "_".join(map_unit),
-        oead.byml.to_text(
+    # Returned as binary BYML, which is far quicker to pass back from a worker than YAML
+    diff = bytes(
+        oead.byml.to_binary(
             Hash(
                 {
                     "Objs": diff_objs(),
                     "Rails": diff_rails() if map_unit.type == "Static" else Hash(),
                 }
-            )
-        ),
+            ),
+            big_endian=False,
+        )
     )
+    cache.save(key, diff)
+    return "_".join(map_unit), diff
 
 
 def generate_modded_map_log(
@@ -275,10 +288,15 @@ def generate_modded_map_log(
     new_hashes: bool = False,
 ) -> Hash:
     modded_maps = consolidate_map_files(modded_mubins)
+    stock.preload(["Pack/TitleBG.pack"])
+    try:
+        stock.get_file(util.get_aoc_dir() / "Pack" / "AocMainField.pack")
+    except FileNotFoundError:
+        pass
     this_pool = pool or util.start_pool()
     diffs = oead.byml.Hash(
         {
-            map_unit: oead.byml.from_text(diff)
+            map_unit: oead.byml.from_binary(diff)
             for map_unit, diff in this_pool.imap_unordered(
                 partial(get_map_diff, tmp_dir=tmp_dir, new_hashes=new_hashes),
                 modded_maps,
@@ -468,10 +486,20 @@ def get_dungeonstatic_diff(mod_pos: Array) -> dict:
 def merge_dungeonstatic(diffs: dict = None):
     """Merges all changes to the CDungeon Static.smubin"""
     if not diffs:
-        try:
-            (util.get_master_modpack_dir() / "logs" / "dungeonstatic.smubin").unlink()
-        except:
-            pass
+        tmp_static = util.get_master_modpack_dir() / "logs" / "dungeonstatic.smubin"
+        if tmp_static.exists():
+            tmp_static.unlink()
+            try:
+                util.inject_file_into_sarc(
+                    "Map/CDungeon/Static.smubin",
+                    util.get_nested_file_bytes(
+                        f"{util.get_game_file('Pack/Bootup.pack')}//Map/CDungeon/Static.smubin",
+                        unyaz=False,
+                    ),
+                    "Pack/Bootup.pack",
+                )
+            except FileNotFoundError:
+                pass
         return
 
     try:
@@ -535,6 +563,31 @@ def parse_legacy_diff(text: str) -> Hash:
     )
 
 
+def _new_section() -> dict:
+    return {"add": {}, "mod": {}, "del": set()}
+
+
+def _fold_section(accumulator: dict, diff: Hash, priority: int):
+    for pos, item in enumerate(diff["add"] if "add" in diff else ()):
+        accumulator["add"][int(item["HashId"])] = (priority, pos, item)
+    if "mod" in diff:
+        accumulator["mod"].update(diff["mod"].items())
+    if "del" in diff:
+        accumulator["del"].update(int(hash_id) for hash_id in diff["del"])
+
+
+def _build_section(accumulator: dict) -> Hash:
+    # Added items are ordered from the highest priority mod down, as they always were
+    added = sorted(accumulator["add"].values(), key=lambda entry: (-entry[0], entry[1]))
+    return Hash(
+        {
+            "add": Array([item for _, _, item in added]),
+            "mod": Hash(accumulator["mod"]),
+            "del": Array([oead.U32(hash_id) for hash_id in accumulator["del"]]),
+        }
+    )
+
+
 class MapMerger(mergers.Merger):
     # pylint: disable=abstract-method
     NAME: str = "maps"
@@ -575,139 +628,120 @@ class MapMerger(mergers.Merger):
     def get_mod_diff(self, mod: util.BcmlMod):
         diffs = []
         if self.is_mod_logged(mod):
-            diff_text = (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-            diff: Hash
-            if not ("Rails" in diff_text and "Objs" in diff_text):
-                diff = parse_legacy_diff(diff_text)
-            else:
-                diff = oead.byml.from_text(diff_text)
-            diffs.append(diff)
+            diffs.append(self._read_map_log(mod.path / "logs"))
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
-                diff_text = (opt / "logs" / self._log_name).read_text(encoding="utf-8")
-                if not ("Rails" in diff_text and "Objs" in diff_text):
-                    diff = parse_legacy_diff(diff_text)
-                else:
-                    diff = oead.byml.from_text(diff_text)
-                diffs.append(diff)
+                diffs.append(self._read_map_log(opt / "logs"))
         return diffs
 
+    def _read_map_log(self, log_dir: Path, units: Iterable[str] = None) -> Hash:
+        diff = self.read_log(log_dir, units)
+        if isinstance(diff, str):
+            return parse_legacy_diff(diff)
+        if diff and not any(
+            isinstance(unit, Hash) and "Rails" in unit and "Objs" in unit
+            for unit in diff.values()
+        ):
+            return Hash(
+                {
+                    unit: Hash({"Objs": changes, "Rails": Hash()})
+                    for unit, changes in diff.items()
+                }
+            )
+        return diff
+
+    def _get_log_dirs(self) -> List[Path]:
+        log_dirs = []
+        for mod in util.get_installed_mods():
+            for log_dir in [
+                mod.path / "logs",
+                *sorted(
+                    d / "logs" for d in (mod.path / "options").glob("*") if d.is_dir()
+                ),
+            ]:
+                if (log_dir / self._log_name).exists():
+                    log_dirs.append(log_dir)
+        return log_dirs
+
+    def _get_unit_diffs(
+        self, log_dirs: List[Path], preloaded: Dict[Path, Hash], units: List[str]
+    ) -> Iterator[Tuple[str, Hash]]:
+        """Consolidates the diffs for each unit in turn, reading only that unit's logs"""
+        for unit in units:
+            diffs = (
+                (
+                    preloaded[log_dir]
+                    if log_dir in preloaded
+                    else self._read_map_log(log_dir, [unit])
+                )
+                for log_dir in log_dirs
+            )
+            yield unit, self.consolidate_diffs(
+                Hash({unit: diff[unit]}) for diff in diffs if unit in diff
+            )[unit]
+
     def get_all_diffs(self):
-        diffs = []
+        # Yielded one mod at a time so they can be folded in without all being loaded
         for mod in util.get_installed_mods():
-            diffs.extend(self.get_mod_diff(mod))
-        return diffs
+            yield from self.get_mod_diff(mod)
 
-    def consolidate_diffs(self, diffs: list):
-        a_diffs = Hash()
-        for mod_diff in diffs:
+    def consolidate_diffs(self, diffs: Iterable[Hash]):
+        units: Dict[str, Dict[str, dict]] = {}
+        for priority, mod_diff in enumerate(diffs):
             for file, diff in mod_diff.items():
-                # a_map = Map(*file.split("_"))
-                if file not in a_diffs:
-                    a_diffs[file] = Array()
-                a_diffs[file].append(diff)
-        c_diffs = Hash()
-        for file, mods in a_diffs.items():
-            c_diffs[file] = Hash(
-                {
-                    "Objs": Hash(
-                        {
-                            "add": Array(),
-                            "mod": Hash(),
-                            "del": Array(
-                                [
-                                    oead.U32(h)
-                                    for h in set(
-                                        [
-                                            hash_id.v
-                                            for hashes in [
-                                                mod["Objs"]["del"]
-                                                for mod in mods
-                                                if "Objs" in mod
-                                                and "del" in mod["Objs"]
-                                            ]
-                                            for hash_id in hashes
-                                        ]
-                                    )
-                                ]
-                            ),
-                        }
-                    ),
-                    "Rails": Hash(
-                        {
-                            "add": Array(),
-                            "mod": Hash(),
-                            "del": Array(
-                                [
-                                    oead.U32(h)
-                                    for h in set(
-                                        [
-                                            hash_id.v
-                                            for hashes in [
-                                                mod["Rails"]["del"]
-                                                for mod in mods
-                                                if "Rails" in mod
-                                                and "del" in mod["Rails"]
-                                            ]
-                                            for hash_id in hashes
-                                        ]
-                                    )
-                                ]
-                            ),
-                        }
-                    ),
-                }
-            )
-            for mod in [m for m in mods if "Objs" in m and "mod" in m["Objs"]]:
-                for hash_id, actor in mod["Objs"]["mod"].items():
-                    c_diffs[file]["Objs"]["mod"][hash_id] = actor
-            for mod in [m for m in mods if "Rails" in m and "mod" in m["Rails"]]:
-                for hash_id, actor in mod["Rails"]["mod"].items():
-                    c_diffs[file]["Rails"]["mod"][hash_id] = actor
-            add_obj_hashes = []
-            add_rail_hashes = []
-            for mod in reversed(mods):
-                if "add" in mod["Objs"]:
-                    for actor in mod["Objs"]["add"]:
-                        if actor["HashId"] not in add_obj_hashes:
-                            add_obj_hashes.append(actor["HashId"])
-                            c_diffs[file]["Objs"]["add"].append(actor)
-                if "add" in mod["Rails"]:
-                    for actor in mod["Rails"]["add"]:
-                        if actor["HashId"] not in add_rail_hashes:
-                            add_rail_hashes.append(actor["HashId"])
-                            c_diffs[file]["Rails"]["add"].append(actor)
-        return c_diffs
+                unit = units.setdefault(
+                    file, {section: _new_section() for section in ("Objs", "Rails")}
+                )
+                for section, accumulator in unit.items():
+                    if section in diff:
+                        _fold_section(accumulator, diff[section], priority)
+        return Hash(
+            {
+                file: Hash(
+                    {
+                        section: _build_section(accumulator)
+                        for section, accumulator in unit.items()
+                    }
+                )
+                for file, unit in units.items()
+            }
+        )
 
     @util.timed
     def perform_merge(self):
-        shutil.rmtree(
-            str(
-                util.get_master_modpack_dir()
-                / util.get_dlc_path()
-                / ("0010" if util.get_settings("wiiu") else "")
-                / "Map"
-                / "MainField"
-            ),
-            ignore_errors=True,
-        )
-        shutil.rmtree(
-            str(
-                util.get_master_modpack_dir()
-                / util.get_content_path()
-                / "Map"
-                / "MainField"
-            ),
-            ignore_errors=True,
-        )
+        for map_dir in [
+            util.get_master_modpack_dir()
+            / util.get_dlc_path()
+            / ("0010" if util.get_settings("wiiu") else "")
+            / "Map"
+            / "MainField",
+            util.get_master_modpack_dir() / util.get_content_path() / "Map" / "MainField",
+        ]:
+            # Leave the mainfield static merger's Static.smubin in place
+            for unit_dir in {d for d in map_dir.glob("*") if d.is_dir()}:
+                shutil.rmtree(str(unit_dir), ignore_errors=True)
         log_path = util.get_master_modpack_dir() / "logs" / "map.log"
         if log_path.exists():
             log_path.unlink()
         print("Loading map mods...")
-        map_diffs = self.consolidate_diffs(self.get_all_diffs())
-        if not map_diffs:
-            print("No map merge necessary")
-            return
+        log_dirs = self._get_log_dirs()
+        # Logs not yet compiled would be parsed again for every unit, so read them once
+        preloaded = {
+            log_dir: self._read_map_log(log_dir)
+            for log_dir in log_dirs
+            if not difflog.is_compiled(log_dir / self._log_name)
+        }
+        units = sorted(
+            {
+                unit
+                for log_dir in log_dirs
+                for unit in (
+                    preloaded[log_dir].keys()
+                    if log_dir in preloaded
+                    else self.get_log_files(log_dir)
+                )
+            }
+        )
         aoc_pack = (
             util.get_master_modpack_dir()
             / util.get_dlc_path()
@@ -715,63 +749,103 @@ class MapMerger(mergers.Merger):
             / "Pack"
             / "AocMainField.pack"
         )
+        self._update_title_statics(
+            {unit.split("_")[0] for unit in units if unit.endswith("_Static")}
+        )
+        if not units:
+            if aoc_pack.exists() and aoc_pack.stat().st_size == 0:
+                aoc_pack.unlink()
+            print("No map merge necessary")
+            return
         if not aoc_pack.exists() or aoc_pack.stat().st_size > 0:
             print("Emptying AocMainField.pack...")
             aoc_pack.parent.mkdir(parents=True, exist_ok=True)
             aoc_pack.write_bytes(b"")
 
-        rstb_vals = rsext.mergers.maps.merge_maps(oead.byml.to_binary(map_diffs, True))
-        # rstb_calc = rstb.SizeCalculator()
-        print("Merging modded map units...")
-
-        # pool = self._pool or util.start_pool()
-        # rstb_results = pool.map(
-        # partial(merge_map, rstb_calc=rstb_calc),
-        # map_diffs.items(),
-        # )
-        # for result in rstb_results:
-        # rstb_vals[result[util.get_dlc_path()][0]] = result[util.get_dlc_path()][1]
-        # rstb_vals[result["main"][0]] = result["main"][1]
-        # if not self._pool:
-        # pool.close()
-        # pool.join()
-
-        stock_static = [m for m in map_diffs if m[1] == "Static"]
-        if stock_static:
-            title_path = (
-                util.get_master_modpack_dir()
-                / util.get_content_path()
-                / "Pack"
-                / "TitleBG.pack"
-            )
-            if not title_path.exists():
-                title_path.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copyfile(util.get_game_file("Pack/TitleBG.pack"), title_path)
-            title_bg: oead.SarcWriter = oead.SarcWriter.from_sarc(
-                oead.Sarc(title_path.read_bytes())
-            )
-            for static in stock_static:
-                del title_bg.files[
-                    f"Map/MainField/{static[0]}/{static[0]}_Static.smubin"
-                ]
-            title_path.write_bytes(title_bg.write()[1])
-        print("Adjusting RSTB...")
+        print(f"Merging {len(units)} modded map units...")
         log_path.parent.mkdir(parents=True, exist_ok=True)
-        with log_path.open("w", encoding="utf-8") as l_file:
-            for canon, val in rstb_vals.items():
-                l_file.write(f"{canon},{val}\n")
+        unit_diffs = self._get_unit_diffs(log_dirs, preloaded, units)
+        threads = os.cpu_count() or 1
+        merged = count(1)
+        # Units are merged in threads in-process, so the stock packs are loaded once,
+        # and only a few batches of unit diffs are held in memory at a time
+        with log_path.open("w", encoding="utf-8") as l_file, ThreadPool(
+            threads
+        ) as pool:
+            while True:
+                batch = [
+                    (unit, bytes(oead.byml.to_binary(diff, True)))
+                    for unit, diff in islice(unit_diffs, threads * 4)
+                ]
+                if not batch:
+                    break
+                for canon, val in pool.imap_unordered(
+                    lambda task: rsext.mergers.maps.merge_map_unit(*task), batch
+                ):
+                    l_file.write(f"{canon},{val}\n")
+                    print(f"Merged {canon} ({next(merged)}/{len(units)})")
         print("Map merge complete")
 
+    @staticmethod
+    def _update_title_statics(units: Set[str]):
+        """
+        Removes the Static.smubin of each merged unit from the master TitleBG.pack so
+        the loose merged unit is used, and restores the stock one for every other unit
+        """
+        title_path = (
+            util.get_master_modpack_dir()
+            / util.get_content_path()
+            / "Pack"
+            / "TitleBG.pack"
+        )
+        if not title_path.exists():
+            if not units:
+                return
+            title_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(util.get_game_file("Pack/TitleBG.pack"), title_path)
+        title_sarc = oead.Sarc(title_path.read_bytes())
+        title_bg: oead.SarcWriter = oead.SarcWriter.from_sarc(title_sarc)
+        changed = False
+        for unit in units:
+            name = f"Map/MainField/{unit}/{unit}_Static.smubin"
+            if title_sarc.get_file(name):
+                del title_bg.files[name]
+                changed = True
+        missing = {
+            f"Map/MainField/{col}-{row}/{col}-{row}_Static.smubin"
+            for col in "ABCDEFGHIJ"
+            for row in range(1, 9)
+            if f"{col}-{row}" not in units
+        }
+        missing = {name for name in missing if not title_sarc.get_file(name)}
+        if missing:
+            stock_sarc = oead.Sarc(util.get_game_file("Pack/TitleBG.pack").read_bytes())
+            for name in missing:
+                file = stock_sarc.get_file(name)
+                if file:
+                    title_bg.files[name] = bytes(file.data)
+                    changed = True
+        if changed:
+            title_path.write_bytes(title_bg.write()[1])
+
+    def get_read_files(self):
+        return {"Pack/TitleBG.pack"}
+
+    def get_written_files(self):
+        return {
+            "Map/MainField/*/*",
+            "Aoc/0010/Map/MainField/*/*",
+            "Aoc/0010/Pack/AocMainField.pack//Map/MainField/*",
+            "Pack/TitleBG.pack//Map/MainField/*",
+        }
+
     def get_checkbox_options(self):
         return [
             ("new_hashes", "Generate unique hashes for added map actors"),
         ]
 
     def get_mod_edit_info(self, mod: util.BcmlMod) -> set:
-        return {
-            f"{key.section}_{key.type}"
-            for key in self.consolidate_diffs(self.get_mod_diff(mod))
-        }
+        return self.get_mod_log_files(mod)
 
 
 class DungeonStaticMerger(mergers.Merger):
@@ -829,18 +903,14 @@ class DungeonStaticMerger(mergers.Merger):
         if self.is_mod_logged(mod):
             util.dict_merge(
                 diffs,
-                oead.byml.from_text(
-                    (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-                ),
+                self.read_log(mod.path / "logs"),
                 overwrite_lists=True,
             )
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diffs,
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    ),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diffs
@@ -863,6 +933,12 @@ class DungeonStaticMerger(mergers.Merger):
     def perform_merge(self):
         merge_dungeonstatic(self.consolidate_diffs(self.get_all_diffs()))
 
+    def get_written_files(self):
+        return {
+            "Aoc/0010/Map/CDungeon/Static.mubin",
+            "Pack/Bootup.pack//Map/CDungeon/Static.mubin",
+        }
+
     def get_checkbox_options(self):
         return []
 
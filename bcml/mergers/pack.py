@@ -5,7 +5,7 @@
 import json
 from multiprocessing import Pool
 from pathlib import Path
-from typing import List, Union, Tuple
+from typing import Callable, List, Optional, Set, Union, Tuple
 
 import oead
 
@@ -138,29 +138,43 @@ class PackMerger(mergers.Merger):
             json.dumps(diff_material, ensure_ascii=False, indent=2), encoding="utf-8"
         )
 
-    def get_mod_diff(self, mod: util.BcmlMod):
+    def _read_packs(
+        self, log_dir: Path, wanted: Optional[Callable[[str], bool]] = None
+    ) -> Set[str]:
+        files = None
+        if wanted:
+            files = [file for file in self.get_log_files(log_dir) if wanted(file)]
+        return {
+            Path(path.replace("\\", "/")).as_posix()
+            for _, path in self.read_log(log_dir, files).items()
+        }
+
+    def get_mod_diff(
+        self, mod: util.BcmlMod, wanted: Optional[Callable[[str], bool]] = None
+    ):
         diffs = set()
         if self.is_mod_logged(mod):
-            diffs |= {
-                Path(path.replace("\\", "/")).as_posix()
-                for _, path in json.loads(
-                    (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-                ).items()
-            }
+            diffs |= self._read_packs(mod.path / "logs", wanted)
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
-                diffs |= {
-                    Path(path.replace("\\", "/")).as_posix()
-                    for _, path in json.loads(
-                        (opt / "logs" / self._log_name).read_text(encoding="utf-8")
-                    ).items()
-                }
+                diffs |= self._read_packs(opt / "logs", wanted)
         return diffs
 
     def get_all_diffs(self):
+        wanted = None
+        if self._partials is not None:
+            # A partial remerge only needs the affected SARCs and any not yet merged
+            master = util.get_master_modpack_dir()
+            merged = {
+                util.get_canon_name(file.relative_to(master).as_posix(), True)
+                for file in master.rglob("**/*")
+                if file.suffix in util.SARC_EXTS
+            }
+            partials = {util.get_canon_name(file) for file in self._partials}
+            wanted = lambda file: file in partials or file not in merged
         diffs = {}
         for mod in util.get_installed_mods():
-            diffs[mod] = self.get_mod_diff(mod)
+            diffs[mod] = self.get_mod_diff(mod, wanted)
         return diffs
 
     def consolidate_diffs(self, diffs):
@@ -185,13 +199,25 @@ class PackMerger(mergers.Merger):
             for s, ss in self.consolidate_diffs(self.get_all_diffs()).items()
             if ss
         }
-        for file in [
-            file
-            for file in util.get_master_modpack_dir().rglob("**/*")
-            if file.suffix in util.SARC_EXTS - EXCLUDE_EXTS
-            and not any(ex in file.name for ex in SPECIAL)
-        ]:
-            file.unlink()
+        master = util.get_master_modpack_dir()
+        if self._partials is None:
+            for file in [
+                file
+                for file in master.rglob("**/*")
+                if file.suffix in util.SARC_EXTS - EXCLUDE_EXTS
+                and not any(ex in file.name for ex in SPECIAL)
+            ]:
+                file.unlink()
+        else:
+            print(f"Remerging {len(self._partials)} affected SARC files...")
+            for file in self._partials:
+                if (master / file).exists():
+                    (master / file).unlink()
+            sarcs = {
+                s: ss
+                for s, ss in sarcs.items()
+                if s in self._partials or not (master / s).exists()
+            }
         for sarc_file in sarcs:
             try:
                 sarcs[sarc_file].insert(0, util.get_game_file(sarc_file))
@@ -212,6 +238,13 @@ class PackMerger(mergers.Merger):
         #     pool.join()
         print("Finished merging SARCs")
 
+    def get_written_files(self):
+        if self._partials is not None:
+            return {util.get_canon_name(file) for file in self._partials}
+        return {
+            f"*{ext.replace('.s', '.')}" for ext in util.SARC_EXTS - EXCLUDE_EXTS
+        } | {f"!*{name}*" for name in SPECIAL}
+
     def get_checkbox_options(self):
         return []
 
@@ -1,9 +1,9 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 
 import oead
-from bcml import mergers, util
+from bcml import cache, mergers, util
 
 
 def get_stock_quests() -> oead.byml.Array:
@@ -13,6 +13,79 @@ def get_stock_quests() -> oead.byml.Array:
     )
 
 
+class QuestList:
+    """
+    An ordered list of quests indexed by name, linked so that quests can be replaced,
+    removed, or inserted after any other quest in constant time
+    """
+
+    _quests: Dict[str, oead.byml.Hash]
+    _prev: Dict[str, Optional[str]]
+    _next: Dict[str, Optional[str]]
+    _head: Optional[str]
+    _tail: Optional[str]
+
+    def __init__(self, quests: oead.byml.Array):
+        self._quests = {}
+        self._prev = {}
+        self._next = {}
+        self._head = None
+        self._tail = None
+        for quest in quests:
+            self.insert_after(self._tail, quest)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._quests
+
+    def __len__(self) -> int:
+        return len(self._quests)
+
+    def replace(self, quest: oead.byml.Hash):
+        """Replaces the quest with the same name in place"""
+        self._quests[quest["Name"]] = quest
+
+    def remove(self, name: str):
+        prev, nxt = self._prev.pop(name), self._next.pop(name)
+        del self._quests[name]
+        if prev is None:
+            self._head = nxt
+        else:
+            self._next[prev] = nxt
+        if nxt is None:
+            self._tail = prev
+        else:
+            self._prev[nxt] = prev
+
+    def insert_after(self, prev: Optional[str], quest: oead.byml.Hash):
+        """Inserts a quest after the named quest, or at the start if the name is None"""
+        name = quest["Name"]
+        if name in self._quests:
+            self.remove(name)
+        nxt = self._head if prev is None else self._next[prev]
+        self._quests[name] = quest
+        self._prev[name] = prev
+        self._next[name] = nxt
+        if prev is None:
+            self._head = name
+        else:
+            self._next[prev] = name
+        if nxt is None:
+            self._tail = name
+        else:
+            self._prev[nxt] = name
+
+    def append(self, quest: oead.byml.Hash):
+        self.insert_after(self._tail, quest)
+
+    def to_array(self) -> oead.byml.Array:
+        quests = oead.byml.Array()
+        name = self._head
+        while name is not None:
+            quests.append(self._quests[name])
+            name = self._next[name]
+        return quests
+
+
 class QuestMerger(mergers.Merger):
     NAME: str = "quests"
 
@@ -28,8 +101,7 @@ class QuestMerger(mergers.Merger):
         ):
             return {}
         print("Logging modified quests...")
-        stock_quests = get_stock_quests()
-        stock_names = [q["Name"] for q in stock_quests]
+        stock_quests = {q["Name"]: q for q in get_stock_quests()}
 
         title_sarc = oead.Sarc(
             (mod_dir / util.get_content_path() / "Pack" / "TitleBG.pack").read_bytes()
@@ -37,21 +109,21 @@ class QuestMerger(mergers.Merger):
         mod_quests = oead.byml.from_binary(
             util.decompress(title_sarc.get_file("Quest/QuestProduct.sbquestpack").data)
         )
-        mod_names = [q["Name"] for q in mod_quests]
+        mod_names = {q["Name"] for q in mod_quests}
         diffs = oead.byml.Hash(
             {
                 "add": oead.byml.Array(),
                 "mod": oead.byml.Hash(),
-                "del": oead.byml.Array({q for q in stock_names if q not in mod_names}),
+                "del": oead.byml.Array({q for q in stock_quests if q not in mod_names}),
             }
         )
 
         for i, quest in enumerate(mod_quests):
             quest_name = quest["Name"]
             quest["prev_quest"] = mod_quests[i-1]["Name"] if i > 0 else "--index_zero"
-            if quest_name not in stock_names:
+            if quest_name not in stock_quests:
                 diffs["add"].append(quest)
-            elif quest != stock_quests[stock_names.index(quest_name)]:
+            elif quest != stock_quests[quest_name]:
                 diffs["mod"][quest_name] = quest
 
         return diffs
@@ -67,18 +139,10 @@ class QuestMerger(mergers.Merger):
     def get_mod_diff(self, mod: util.BcmlMod):
         diffs = []
         if self.is_mod_logged(mod):
-            diffs.append(
-                oead.byml.from_text(
-                    (mod.path / "logs" / self._log_name).read_text(encoding="utf-8")
-                )
-            )
+            diffs.append(self.read_log(mod.path / "logs"))
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
-                diffs.append(
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    )
-                )
+                diffs.append(self.read_log(opt / "logs"))
         return diffs
 
     def get_all_diffs(self):
@@ -134,44 +198,47 @@ class QuestMerger(mergers.Merger):
                 except FileNotFoundError:
                     pass
             return
-        print("Loading stock quests...")
-        quests = get_stock_quests()
-        stock_names = [q["Name"] for q in quests]
-
-        print("Merging quest mods...")
-        for name, mod in diffs["mod"].items():
-            try:
-                quests[stock_names.index(name)] = mod
-            except (IndexError, ValueError):
-                diffs["add"].append(mod)
-        for delete in reversed(diffs["del"]):
-            try:
-                quests.remove(quests[stock_names.index(delete)])
-            except ValueError:
-                pass
-            except IndexError:
-                raise RuntimeError(
-                    f"An error occurred when attempting to remove a quest from your "
-                    "game. Most of the time this means the mod was accidentally made "
-                    "using the base game 1.0 TitleBG.pack instead of the latest updated "
-                    "version. Please contact the mod author for assistance."
-                )
-        added_names = set()
-        for add in diffs["add"]:
-            if add["Name"] not in added_names:
-                quest_index = len(quests)
-                try:
-                    quest_index = 0 if add["prev_quest"] == "--index_zero" else [q["Name"] for q in quests].index(add["prev_quest"]) + 1
-                    del add["prev_quest"]
-                except KeyError:
-                    pass
-                except ValueError:
-                    del add["prev_quest"]
-                quests.insert(quest_index, add)
+        cache_key = cache.get_key(self.NAME, diffs, ["Pack/TitleBG.pack"])
+        data = cache.load(cache_key)
+        if data is None:
+            print("Loading stock quests...")
+            quests = QuestList(get_stock_quests())
+
+            print("Merging quest mods...")
+            for name, mod in diffs["mod"].items():
+                if name in quests:
+                    quests.replace(mod)
+                else:
+                    diffs["add"].append(mod)
+            for delete in diffs["del"]:
+                if delete in quests:
+                    quests.remove(delete)
+            added_names = set()
+            for add in diffs["add"]:
+                if add["Name"] in added_names:
+                    continue
                 added_names.add(add["Name"])
+                if "prev_quest" not in add:
+                    quests.append(add)
+                    continue
+                prev_quest = add["prev_quest"]
+                del add["prev_quest"]
+                if prev_quest == "--index_zero":
+                    quests.insert_after(None, add)
+                elif prev_quest in quests:
+                    quests.insert_after(prev_quest, add)
+                else:
+                    quests.append(add)
 
-        print("Writing new quest pack...")
-        data = oead.byml.to_binary(quests, big_endian=util.get_settings("wiiu"))
+            print("Writing new quest pack...")
+            data = bytes(
+                oead.byml.to_binary(
+                    quests.to_array(), big_endian=util.get_settings("wiiu")
+                )
+            )
+            cache.save(cache_key, data)
+        else:
+            print("Restoring cached quest merge...")
         merged_quests.parent.mkdir(parents=True, exist_ok=True)
         merged_quests.write_bytes(data)
         util.inject_file_into_sarc(
@@ -191,5 +258,8 @@ class QuestMerger(mergers.Merger):
             | set(diff["del"])
         )
 
+    def get_written_files(self):
+        return {"Pack/TitleBG.pack//Quest/QuestProduct.bquestpack"}
+
     def get_checkbox_options(self):
         return []
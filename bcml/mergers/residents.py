@@ -6,7 +6,7 @@ from typing import List, Union
 
 import oead
 import rstb
-from bcml import util, mergers
+from bcml import cache, util, mergers
 from bcml.util import BcmlMod
 from bcml.mergers import rstable
 from oead.byml import Hash
@@ -74,16 +74,12 @@ class ResidentsMerger(mergers.Merger):
     def get_mod_diff(self, mod: util.BcmlMod):
         diff = oead.byml.Hash()
         if self.is_mod_logged(mod):
-            diff = oead.byml.from_text(
-                (mod.path / "logs" / self._log_name).read_text("utf-8")
-            )
+            diff = self.read_log(mod.path / "logs")
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diff,
-                    oead.byml.from_text(
-                        (opt / "logs" / self._log_name).read_text("utf-8")
-                    ),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diff
@@ -129,17 +125,29 @@ class ResidentsMerger(mergers.Merger):
                     pass
             return
 
-        residents = get_stock_residents()
-        util.dict_merge(residents, diffs, overwrite_lists=True)
-        residents = Hash(
-            {actor: data for actor, data in residents.items() if "remove" not in data}
-        )
+        cache_key = cache.get_key(self.NAME, diffs, ["Pack/Bootup.pack"])
+        resident_bytes = cache.load(cache_key)
+        if resident_bytes is None:
+            residents = get_stock_residents()
+            util.dict_merge(residents, diffs, overwrite_lists=True)
+            residents = Hash(
+                {
+                    actor: data
+                    for actor, data in residents.items()
+                    if "remove" not in data
+                }
+            )
 
-        resident_bytes = oead.byml.to_binary(
-            oead.byml.Array([data for _, data in residents.items()]),
-            big_endian=util.get_settings("wiiu"),
-        )
-        del residents
+            resident_bytes = bytes(
+                oead.byml.to_binary(
+                    oead.byml.Array([data for _, data in residents.items()]),
+                    big_endian=util.get_settings("wiiu"),
+                )
+            )
+            del residents
+            cache.save(cache_key, resident_bytes)
+        else:
+            print("Restoring cached resident actors merge...")
         util.inject_file_into_sarc(
             "Actor/ResidentActors.byml",
             resident_bytes,
@@ -155,6 +163,9 @@ class ResidentsMerger(mergers.Merger):
         del resident_bytes
         rstable.set_size("Actor/ResidentActors.byml", rstb_size)
 
+    def get_written_files(self):
+        return {"Pack/Bootup.pack//Actor/ResidentActors.byml"}
+
     def get_checkbox_options(self):
         return []
 
@@ -5,20 +5,24 @@
 import json
 import io
 import math
+import os
 import struct
+from contextlib import AbstractContextManager
 from copy import deepcopy
 from functools import partial, reduce
 from multiprocessing import Pool
 from pathlib import Path
-from typing import List, Union, ByteString, Dict
+from typing import List, Union, ByteString, Dict, Optional, Tuple
 
 # pylint: disable=wrong-import-order
 import oead
 import rstb
+import xxhash
 from botw.rstb import guess_aamp_size, guess_bfres_size
 from rstb.util import read_rstb
 
 from bcml import util, mergers
+from bcml.__version__ import VERSION
 
 Contents = Union[List[str], Dict[str, Union[Dict, List[str]]]]
 
@@ -98,7 +102,7 @@ def get_stock_rstb() -> rstb.ResourceSizeTable:
     return deepcopy(get_stock_rstb.table)
 
 
-def set_size(entry: str, size: int):
+def _write_sizes(sizes: Dict[str, int]):
     rstb_path = (
         util.get_master_modpack_dir()
         / util.get_content_path()
@@ -111,12 +115,66 @@ def set_size(entry: str, size: int):
     else:
         table = get_stock_rstb()
         rstb_path.parent.mkdir(parents=True, exist_ok=True)
-    table.set_size(entry, size)
+    for entry, size in sizes.items():
+        table.set_size(entry, size)
     buf = io.BytesIO()
     table.write(buf, be=util.get_settings("wiiu"))
     rstb_path.write_bytes(util.compress(buf.getvalue()))
 
 
+class RstbSession(AbstractContextManager):
+    """
+    Collects RSTB size updates from mergers so the master RSTB is written only once,
+    either by the RSTB merger or when the session exits
+    """
+
+    _active: Optional["RstbSession"] = None
+    _sizes: Dict[str, int]
+    _outer: bool
+
+    def __init__(self):
+        self._sizes = {}
+        self._outer = False
+
+    @classmethod
+    def get_active(cls) -> Optional["RstbSession"]:
+        return cls._active
+
+    def __enter__(self):
+        if RstbSession._active is None:
+            RstbSession._active = self
+            self._outer = True
+            return self
+        return RstbSession._active
+
+    def __exit__(self, exctype, excinst, exctb):
+        if self._outer:
+            RstbSession._active = None
+            self.flush()
+
+    def set_size(self, entry: str, size: int):
+        self._sizes[entry] = size
+
+    def take(self) -> Dict[str, int]:
+        """Gets and clears the pending size updates"""
+        sizes, self._sizes = self._sizes, {}
+        return sizes
+
+    def flush(self):
+        """Writes any pending size updates to the master RSTB"""
+        sizes = self.take()
+        if sizes:
+            _write_sizes(sizes)
+
+
+def set_size(entry: str, size: int):
+    session = RstbSession.get_active()
+    if session is not None:
+        session.set_size(entry, size)
+    else:
+        _write_sizes({entry: size})
+
+
 def _get_modded_file_size(file: Path, mod_dir: Path, guess: bool) -> Dict[str, int]:
     try:
         canon = util.get_canon_name(file.relative_to(mod_dir).as_posix())
@@ -211,6 +269,81 @@ def _get_sizes_in_sarc(
     return sizes
 
 
+def _get_index_path() -> Path:
+    return util.get_storage_dir() / "cache" / "rstb_index.json"
+
+
+def _get_index_header(guess: bool, sarc_guess: bool) -> dict:
+    return {
+        "version": VERSION,
+        "wiiu": util.get_settings("wiiu"),
+        "guess": guess,
+        "sarc_guess": sarc_guess,
+    }
+
+
+def load_size_index(guess: bool, sarc_guess: bool) -> Dict[str, dict]:
+    """
+    Loads the persisted index of computed sizes for master mod files, or an empty
+    index if it was saved by another BCML version or with different settings
+    """
+    try:
+        index = json.loads(_get_index_path().read_text("utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if index.get("header") != _get_index_header(guess, sarc_guess):
+        return {}
+    return index.get("files", {})
+
+
+def save_size_index(files: Dict[str, dict], guess: bool, sarc_guess: bool):
+    index_path = _get_index_path()
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(
+        json.dumps({"header": _get_index_header(guess, sarc_guess), "files": files}),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, index_path)
+
+
+def _is_index_entry_current(file: Path, entry: Optional[dict]) -> bool:
+    if not entry:
+        return False
+    stat = file.stat()
+    return entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns
+
+
+def _get_master_file_sizes(
+    file: Path, entry: Optional[dict], mod_dir: Path, guess: bool, sarc_guess: bool
+) -> Tuple[str, dict]:
+    stat = file.stat()
+    digest = xxhash.xxh64_hexdigest(file.read_bytes())
+    if entry and entry["hash"] == digest:
+        sizes, nested = entry["sizes"], entry["nested"]
+    else:
+        sizes = (
+            _get_modded_file_size(file, mod_dir, guess)
+            if file.suffix not in EXCLUDE_EXTS
+            else {}
+        )
+        nested = (
+            _get_sizes_in_sarc(file, sarc_guess)
+            if file.suffix in util.SARC_EXTS - SARC_EXCLUDES
+            else {}
+        )
+    return (
+        file.relative_to(mod_dir).as_posix(),
+        {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": digest,
+            "sizes": sizes,
+            "nested": nested,
+        },
+    )
+
+
 class RstbMerger(mergers.Merger):
     """ A merger for the ResourceSizeTable.product.srsizetable """
 
@@ -300,14 +433,10 @@ class RstbMerger(mergers.Merger):
     def get_mod_diff(self, mod: util.BcmlMod):
         diff = {}
         if self.is_mod_logged(mod):
-            diff.update(
-                json.loads((mod.path / "logs" / self._log_name).read_text("utf-8"))
-            )
+            diff.update(self.read_log(mod.path / "logs"))
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
-                diff.update(
-                    json.loads((opt / "logs" / self._log_name).read_text("utf-8"))
-                )
+                diff.update(self.read_log(opt / "logs"))
         return diff
 
     def get_all_diffs(self):
@@ -322,6 +451,12 @@ class RstbMerger(mergers.Merger):
             all_diffs.update(diff)
         return all_diffs
 
+    def get_read_files(self):
+        return {"*"}
+
+    def get_written_files(self):
+        return {"System/Resource/ResourceSizeTable.product.rsizetable"}
+
     def get_checkbox_options(self) -> List[tuple]:
         return [
             ("no_guess", "Don't estimate RSTB values for AAMP and BFRES files"),
@@ -335,42 +470,55 @@ class RstbMerger(mergers.Merger):
         diffs = self.consolidate_diffs(self.get_all_diffs())
         master = util.get_master_modpack_dir()
         master_files = {
-            f for f in master.rglob("**/*") if f.is_file() and "logs" not in f.parts
+            f
+            for f in master.rglob("**/*")
+            if f.is_file()
+            and "logs" not in f.parts
+            and (
+                f.suffix not in EXCLUDE_EXTS
+                or f.suffix in util.SARC_EXTS - SARC_EXCLUDES
+            )
         }
-        diffs.update(
-            {
-                k: v
-                for r in pool.map(
-                    partial(
-                        _get_modded_file_size,
-                        mod_dir=master,
-                        guess=not self._options.get("no_guess", False),
-                    ),
-                    {f for f in master_files if f.suffix not in EXCLUDE_EXTS},
-                )
-                for k, v in r.items()
-                if r is not None and not self.should_exclude(k, v)
-            }
+        guess = not self._options.get("no_guess", False)
+        sarc_guess = not util.get_settings("no_guess")
+        old_index = load_size_index(guess, sarc_guess)
+        index = {}
+        changed = []
+        for file in master_files:
+            entry = old_index.get(file.relative_to(master).as_posix())
+            if _is_index_entry_current(file, entry):
+                index[file.relative_to(master).as_posix()] = entry
+            else:
+                changed.append((file, entry))
+        util.vprint(
+            f"Calculating RSTB sizes for {len(changed)} of {len(master_files)} files"
         )
-
-        diffs.update(
-            {
-                k: v
-                for r in pool.map(
-                    partial(
-                        _get_sizes_in_sarc,
-                        guess=not util.get_settings("no_guess"),
-                    ),
-                    {
-                        f
-                        for f in master_files
-                        if f.suffix in util.SARC_EXTS - SARC_EXCLUDES
-                    },
-                )
-                for k, v in r.items()
-                if r is not None and not self.should_exclude(k, v)
-            }
+        index.update(
+            pool.starmap(
+                partial(
+                    _get_master_file_sizes,
+                    mod_dir=master,
+                    guess=guess,
+                    sarc_guess=sarc_guess,
+                ),
+                changed,
+            )
         )
+        save_size_index(index, guess, sarc_guess)
+        del old_index, changed
+
+        for key in ("sizes", "nested"):
+            diffs.update(
+                {
+                    k: v
+                    for entry in index.values()
+                    for k, v in entry[key].items()
+                    if not self.should_exclude(k, v)
+                }
+            )
+        session = RstbSession.get_active()
+        if session is not None:
+            diffs.update(session.take())
         table = self._table
         for canon, size in diffs.copy().items():
             if size == 0:
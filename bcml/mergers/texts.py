@@ -13,7 +13,7 @@ from typing import List, Union, Set, ByteString
 import oead
 import xxhash
 
-from bcml import mergers, util
+from bcml import cache, mergers, util
 from bcml import bcml as rsext
 from bcml.util import get_7z_path
 
@@ -147,13 +147,13 @@ class TextsMerger(mergers.Merger):
         if self.is_mod_logged(mod):
             util.dict_merge(
                 diff,
-                json.loads((mod.path / "logs" / self._log_name).read_text("utf-8")),
+                self.read_log(mod.path / "logs"),
             )
         for opt in {d for d in (mod.path / "options").glob("*") if d.is_dir()}:
             if (opt / "logs" / self._log_name).exists():
                 util.dict_merge(
                     diff,
-                    json.loads((opt / "logs" / self._log_name).read_text("utf-8")),
+                    self.read_log(opt / "logs"),
                     overwrite_lists=True,
                 )
         return diff
@@ -220,19 +220,34 @@ class TextsMerger(mergers.Merger):
             return
 
         for lang in user_langs:
+            out = (
+                util.get_master_modpack_dir()
+                / util.get_content_path()
+                / "Pack"
+                / f"Bootup_{lang}.pack"
+            )
+            lang_diff = json.dumps(diffs[lang])
+            cache_key = cache.get_key(
+                self.NAME, lang_diff, [f"Pack/Bootup_{lang}.pack"]
+            )
+            data = cache.load(cache_key)
+            if data is not None:
+                out.parent.mkdir(parents=True, exist_ok=True)
+                out.write_bytes(data)
+                print(f"{lang} texts restored from cache")
+                continue
             rsext.mergers.texts.merge_language(
-                json.dumps(diffs[lang]),
+                lang_diff,
                 str(util.get_game_file(f"Pack/Bootup_{lang}.pack")),
-                str(
-                    util.get_master_modpack_dir()
-                    / util.get_content_path()
-                    / "Pack"
-                    / f"Bootup_{lang}.pack"
-                ),
+                str(out),
                 util.get_settings("wiiu"),
             )
+            cache.save(cache_key, out.read_bytes())
             print(f"{lang} texts merged successfully")
 
+    def get_written_files(self):
+        return {"Pack/Bootup_*.pack"}
+
     def get_checkbox_options(self) -> List[tuple]:
         return [
             ("all_langs", "Merge texts for all game languages"),
@@ -0,0 +1,129 @@
+"""Provides a shared-memory cache of decompressed stock game files for pool workers"""
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+import struct
+from collections import OrderedDict
+from multiprocessing import current_process
+from pathlib import Path
+from typing import Dict, Iterable
+
+import oead
+import xxhash  # pylint: disable=wrong-import-order
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.7
+    shared_memory = None  # pylint: disable=invalid-name
+
+from bcml import util
+
+MAX_RESIDENT_SIZE = 1024 * 1024 * 1024
+_LENGTH = struct.Struct("<Q")
+_SEGMENTS: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+_ATTACHED: Dict[str, "shared_memory.SharedMemory"] = {}
+
+
+def _is_owner() -> bool:
+    return "Pool" not in current_process().name
+
+
+def _load(path: Path, nested: str) -> bytes:
+    if not nested:
+        return bytes(util.unyaz_if_needed(path.read_bytes()))
+    outer, _, nested = nested.rpartition("//")
+    file = oead.Sarc(get_file(path, outer)).get_file(nested)
+    if not file:
+        raise FileNotFoundError(f"{nested} not found in {path}")
+    return bytes(util.unyaz_if_needed(file.data))
+
+
+def _create_segment(name: str, path: Path, nested: str):
+    data = _load(path, nested)
+    try:
+        segment = shared_memory.SharedMemory(
+            name=name, create=True, size=_LENGTH.size + max(len(data), 1)
+        )
+        _LENGTH.pack_into(segment.buf, 0, len(data))
+        segment.buf[_LENGTH.size : _LENGTH.size + len(data)] = data
+    except FileExistsError:
+        # Left over from an earlier session, and named by content, so still valid
+        segment = shared_memory.SharedMemory(name=name)
+    del data
+    _SEGMENTS[name] = segment
+    _evict()
+    return segment
+
+
+def _release(segment: "shared_memory.SharedMemory"):
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        segment.close()
+    except BufferError:
+        # A view is still in use, so the mapping is freed once it is collected
+        pass
+
+
+def _evict(max_size: int = MAX_RESIDENT_SIZE):
+    total = sum(segment.size for segment in _SEGMENTS.values())
+    while total > max_size and len(_SEGMENTS) > 1:
+        _, segment = _SEGMENTS.popitem(last=False)
+        total -= segment.size
+        _release(segment)
+
+
+def get_file(path: Path, nested: str = "") -> memoryview:
+    """
+    Gets a decompressed stock file, or a decompressed file nested inside it, as a
+    view of a shared memory segment. Segments are created by the main process and
+    attached by pool workers, which read from disk anything not already shared.
+    """
+    stat = path.stat()
+    key = f"{path.as_posix()}:{stat.st_size}:{stat.st_mtime_ns}//{nested}"
+    name = f"bcml_{xxhash.xxh64_hexdigest(key.encode())}"
+    if shared_memory is None:
+        return memoryview(_load(path, nested))
+    if _is_owner():
+        segment = _SEGMENTS.get(name)
+        if segment is None:
+            segment = _create_segment(name, path, nested)
+        else:
+            _SEGMENTS.move_to_end(name)
+    else:
+        segment = _ATTACHED.get(name)
+        if segment is None:
+            try:
+                segment = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                return memoryview(_load(path, nested))
+            _ATTACHED[name] = segment
+    length = _LENGTH.unpack_from(segment.buf)[0]
+    return segment.buf[_LENGTH.size : _LENGTH.size + length]
+
+
+def get_game_file(file: str, aoc: bool = False) -> memoryview:
+    """
+    Gets a decompressed stock game file by its game path, where files nested in a
+    SARC are joined with `//`
+    """
+    outer, _, nested = file.partition("//")
+    return get_file(util.get_game_file(outer, aoc=aoc), nested)
+
+
+def preload(files: Iterable[str]):
+    """Shares stock game files with pool workers ahead of a job that reads them"""
+    if shared_memory is None or not _is_owner():
+        return
+    for file in files:
+        try:
+            get_game_file(file)
+        except (FileNotFoundError, ValueError, RuntimeError, oead.InvalidDataError):
+            continue
+
+
+def clear():
+    """Releases every shared stock file"""
+    while _SEGMENTS:
+        _release(_SEGMENTS.popitem()[1])
@@ -4,11 +4,13 @@
 import functools
 import gc
 import json
+import mmap
 import multiprocessing
 import os
 import re
 import shutil
 import socket
+import struct
 import sys
 import urllib.error
 import urllib.request
@@ -22,6 +24,7 @@ from datetime import datetime
 from functools import lru_cache
 from io import StringIO
 from multiprocessing import current_process
+from multiprocessing.pool import Pool
 from pathlib import Path
 from platform import system, python_version_tuple
 from pprint import pformat
@@ -37,12 +40,18 @@ import xxhash  # pylint: disable=wrong-import-order
 from oead.aamp import ParameterIO, ParameterList  # pylint:disable=import-error
 from webview import Window  # pylint: disable=wrong-import-order
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # pylint: disable=invalid-name
+
 from bcml import bcml as rsext, locks
 from bcml import pickles, DEBUG  # pylint: disable=unused-import
 from bcml.__version__ import VERSION
 
 
 CREATE_NO_WINDOW = 0x08000000
+FICLONE = 0x40049409
 SARC_EXTS = {
     ".sarc",
     ".pack",
@@ -267,10 +276,14 @@ class BcmlMod:
     priority: int
     path: Path
 
-    def __init__(self, mod_path):
+    def __init__(self, mod_path, info: dict = None):
         self.path = mod_path
         try:
-            self._info = json.loads((self.path / "info.json").read_text("utf-8"))
+            self._info = (
+                info
+                if info is not None
+                else json.loads((self.path / "info.json").read_text("utf-8"))
+            )
             assert "name" in self._info
             assert "id" in self._info
             assert "priority" in self._info
@@ -373,6 +386,7 @@ class BcmlMod:
         self.info_path.write_text(
             json.dumps(self._info, ensure_ascii=False, indent=2), encoding="utf-8"
         )
+        invalidate_mod_index()
 
     @property
     def mergers(self) -> list:
@@ -393,6 +407,7 @@ class BcmlMod:
         self._info["priority"] = priority
         self._save_changes()
         self.path.rename(self.path.parent.resolve() / self._get_folder_id())
+        invalidate_mod_index()
 
     def get_preview(self) -> Path:
         if self._preview is None:
@@ -476,7 +491,84 @@ def clear_all_caches():
         wrap.cache_clear()
 
 
+_WORKER_POOL: Optional[Pool] = None
+
+
+def _init_worker():
+    # pylint: disable=import-outside-toplevel
+    try:
+        get_hash_table(get_settings("wiiu"))
+        from bcml.mergers import rstable
+
+        rstable.get_stock_rstb()
+    except Exception:  # pylint: disable=broad-except
+        # Warming up is only an optimization, the worker will load what it needs
+        pass
+
+
+class SharedPool(AbstractContextManager):
+    """
+    A handle to the long-lived worker pool of the worker service. It stands in for
+    a pool from `start_pool`, but closing it or leaving its context leaves the pool
+    running for the next caller. Terminating it, or leaving its context on an error,
+    stops any queued work by replacing the shared pool with a fresh one.
+    """
+
+    _pool: Pool
+
+    def __init__(self, pool: Pool):
+        self._pool = pool
+
+    def __getattr__(self, attr: str):
+        return getattr(self._pool, attr)
+
+    def __exit__(self, exctype, excinst, exctb):
+        if exctype is not None:
+            self.terminate()
+
+    def close(self):
+        pass
+
+    def join(self):
+        pass
+
+    def terminate(self):
+        if self._pool is _WORKER_POOL:
+            restart_worker_service()
+
+
+def start_worker_service():
+    """
+    Starts a long-lived pool of pre-warmed workers which `start_pool` hands out until
+    the service is stopped
+    """
+    global _WORKER_POOL  # pylint: disable=global-statement
+    if _WORKER_POOL is None:
+        _WORKER_POOL = multiprocessing.Pool(
+            processes=min(63, os.cpu_count()),
+            maxtasksperchild=500,
+            initializer=_init_worker,
+        )
+
+
+def stop_worker_service():
+    global _WORKER_POOL  # pylint: disable=global-statement
+    if _WORKER_POOL is not None:
+        _WORKER_POOL.terminate()
+        _WORKER_POOL.join()
+        _WORKER_POOL = None
+
+
+def restart_worker_service():
+    """Restarts the worker service, if running, so its workers reload settings"""
+    if _WORKER_POOL is not None:
+        stop_worker_service()
+        start_worker_service()
+
+
 def start_pool():
+    if _WORKER_POOL is not None:
+        return SharedPool(_WORKER_POOL)
     return multiprocessing.Pool(processes=min(63, os.cpu_count()), maxtasksperchild=500)
 
 
@@ -561,9 +653,16 @@ def get_work_dir() -> Path:
     return work_dir
 
 
+def get_stage_dir() -> Path:
+    stage_dir = get_storage_dir() / "tmp"
+    if not stage_dir.exists():
+        stage_dir.mkdir(parents=True, exist_ok=True)
+    return stage_dir
+
+
 def clear_temp_dir():
     """Empties BCML's temp directories"""
-    for path in get_work_dir().glob("tmp*"):
+    for path in [*get_work_dir().glob("tmp*"), *get_stage_dir().glob("tmp*")]:
         try:
             if path.is_dir():
                 shutil.rmtree(str(path))
@@ -573,6 +672,48 @@ def clear_temp_dir():
             pass
 
 
+# Files BCML rewrites in place while installing, which must not share data with the
+# source mod
+STAGE_COPY_EXTS = SARC_EXTS | {".json", ".txt", ".yml", ".yaml", ".log"}
+
+
+def clone_file(src: Path, dst: Path):
+    """Copies a file as a copy-on-write reflink where supported, or in full otherwise"""
+    if fcntl is not None:
+        try:
+            with src.open("rb") as src_file, dst.open("wb") as dst_file:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def stage_tree(src: Path, dst: Path):
+    """
+    Reproduces a mod folder without copying its data where possible. Files BCML
+    does not rewrite are hardlinked, and the rest are reflinked, falling back to
+    full copies across filesystems or where links are unsupported.
+    """
+    dst.mkdir(parents=True, exist_ok=True)
+    link = True
+    for file in src.rglob("*"):
+        rel = file.relative_to(src)
+        out = dst / rel
+        if file.is_dir():
+            out.mkdir(parents=True, exist_ok=True)
+            continue
+        out.parent.mkdir(parents=True, exist_ok=True)
+        if link and file.suffix not in STAGE_COPY_EXTS and rel.parts[0] != "logs":
+            try:
+                os.link(file, out)
+                continue
+            except OSError:
+                link = False
+        clone_file(file, out)
+
+
 DEFAULT_SETTINGS = {
     "cemu_dir": "",
     "game_dir": "",
@@ -820,11 +961,13 @@ class TempSettingsContext(AbstractContextManager):
             "w", encoding="utf-8"
         ) as s_file:
             json.dump(get_settings.settings, s_file, indent=2)
+        restart_worker_service()
 
     def __exit__(self, exctype, excinst, exctb):
         setattr(get_settings, "settings", self._settings)
         clear_all_caches()
         (get_data_dir() / "tmp_settings.json").unlink()
+        restart_worker_service()
 
 
 class TempModContext(TempSettingsContext):
@@ -1013,18 +1156,234 @@ def get_merged_modpack_dir() -> Path:
         return get_storage_dir() / "merged_nx"
 
 
+class StockHashTable:
+    """
+    A read-only table of the xxhashes of every stock game file, memory-mapped from a
+    binary file compiled from the bundled JSON hash table. The binary holds a header,
+    a sorted array of name entries, an array of u64 hashes, an array of the u32
+    decompressed size of each hash and a string blob, so lookups are a binary search
+    without loading the table into memory. Sizes are taken from the game dump for
+    files with only one stock version, and are 0 where unknown.
+    """
+
+    MAGIC = b"BCHT"
+    VERSION = 2
+    _HEADER = struct.Struct("<4sIII")
+    _ENTRY = struct.Struct("<IIII")
+    _HASH = struct.Struct("<Q")
+    _SIZE = struct.Struct("<I")
+
+    _wiiu: bool
+    _map: mmap.mmap
+    _count: int
+    _entries_offset: int
+    _hashes_offset: int
+    _sizes_offset: int
+    _strings_offset: int
+    path: Path
+
+    def __init__(self, wiiu: bool = True):
+        self._wiiu = wiiu
+        path = self._get_compiled_path(wiiu)
+        if not path.exists():
+            self._compile(wiiu, path)
+        self.path = path
+        with path.open("rb") as table_file:
+            self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count, hash_count = self._HEADER.unpack_from(self._map)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{path} is not a valid BCML hash table")
+        self._entries_offset = self._HEADER.size
+        self._hashes_offset = self._entries_offset + self._count * self._ENTRY.size
+        self._sizes_offset = self._hashes_offset + hash_count * self._HASH.size
+        self._strings_offset = self._sizes_offset + hash_count * self._SIZE.size
+
+    def __reduce__(self):
+        return (get_hash_table, (self._wiiu,))
+
+    @staticmethod
+    def _get_source_path(wiiu: bool) -> Path:
+        return (
+            get_exec_dir() / "data" / "hashes" / f'{"wiiu" if wiiu else "switch"}.sjson'
+        )
+
+    @staticmethod
+    def _get_dump_dirs(wiiu: bool) -> List[Tuple[str, Path]]:
+        """
+        Gets the game dump folders for a platform with the prefix of the canonical
+        names of their files, in ascending order of priority
+        """
+        dump_dirs: List[Tuple[str, Path]] = []
+        if bool(get_settings("wiiu")) != wiiu:
+            return dump_dirs
+        for prefix, get_dir in [
+            ("", get_game_dir),
+            ("", get_update_dir),
+            ("Aoc/0010/", get_aoc_dir),
+        ]:
+            try:
+                dump_dir = (prefix, get_dir())
+            except FileNotFoundError:
+                continue
+            if dump_dir not in dump_dirs:
+                dump_dirs.append(dump_dir)
+        return dump_dirs
+
+    @classmethod
+    def _get_compiled_path(cls, wiiu: bool) -> Path:
+        stat = cls._get_source_path(wiiu).stat()
+        dump_dirs = cls._get_dump_dirs(wiiu)
+        dump = (
+            xxhash.xxh64_hexdigest(
+                "\0".join(f"{prefix}{path}" for prefix, path in dump_dirs).encode()
+            )
+            if dump_dirs
+            else "nodump"
+        )
+        return (
+            get_data_dir()
+            / "hashes"
+            / (
+                f'{"wiiu" if wiiu else "switch"}-{cls.VERSION}-'
+                f"{stat.st_size}-{stat.st_mtime_ns}-{dump}.bin"
+            )
+        )
+
+    @staticmethod
+    def _get_dump_sizes(
+        table: Dict[str, List[int]], dump_dirs: List[Tuple[str, Path]]
+    ) -> Dict[str, int]:
+        """
+        Gets the decompressed sizes of the loose files in the game dump which have only
+        one stock version, reading no more than the Yaz0 header of each
+        """
+        sizes: Dict[str, int] = {}
+        for prefix, dump_dir in dump_dirs:
+            for root, _, files in os.walk(dump_dir):
+                for file in files:
+                    path = Path(root) / file
+                    name = prefix + path.relative_to(dump_dir).as_posix().replace(
+                        ".s", "."
+                    )
+                    if len(set(table.get(name, ()))) != 1:
+                        continue
+                    try:
+                        with path.open("rb") as stock_file:
+                            header = stock_file.read(8)
+                            size = os.fstat(stock_file.fileno()).st_size
+                    except OSError:
+                        continue
+                    sizes[name] = _get_decompressed_size(header, size)
+        return sizes
+
+    @classmethod
+    def _compile(cls, wiiu: bool, path: Path):
+        table: Dict[str, List[int]] = json.loads(
+            decompress(cls._get_source_path(wiiu).read_bytes()).decode("utf-8")
+        )
+        dump_sizes = cls._get_dump_sizes(table, cls._get_dump_dirs(wiiu))
+        names = sorted(table.keys(), key=lambda name: name.encode("utf-8"))
+        entries = bytearray()
+        hashes = bytearray()
+        sizes = bytearray()
+        strings = bytearray()
+        hash_count = 0
+        for name in names:
+            name_bytes = name.encode("utf-8")
+            file_hashes = sorted(set(table[name]))
+            entries += cls._ENTRY.pack(
+                len(strings), len(name_bytes), hash_count, len(file_hashes)
+            )
+            for file_hash in file_hashes:
+                hashes += cls._HASH.pack(file_hash)
+                sizes += cls._SIZE.pack(dump_sizes.get(name, 0))
+            hash_count += len(file_hashes)
+            strings += name_bytes
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for old in path.parent.glob(f'{"wiiu" if wiiu else "switch"}-*.bin'):
+            if old == path:
+                continue
+            try:
+                old.unlink()
+            except OSError:
+                pass
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(
+            cls._HEADER.pack(cls.MAGIC, cls.VERSION, len(names), hash_count)
+            + entries
+            + hashes
+            + sizes
+            + strings
+        )
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Another process compiled and opened the table first
+            tmp_path.unlink()
+
+    def _get_entry(self, index: int) -> Tuple[int, int, int, int]:
+        return self._ENTRY.unpack_from(
+            self._map, self._entries_offset + index * self._ENTRY.size
+        )
+
+    def _find(self, name: str) -> Optional[Tuple[int, int]]:
+        key = name.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            str_offset, str_len, hash_index, hash_count = self._get_entry(mid)
+            start = self._strings_offset + str_offset
+            mid_name = self._map[start : start + str_len]
+            if mid_name < key:
+                low = mid + 1
+            elif mid_name > key:
+                high = mid
+            else:
+                return hash_index, hash_count
+        return None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._find(name) is not None
+
+    def __getitem__(self, name: str) -> Tuple[int, ...]:
+        found = self._find(name)
+        if found is None:
+            raise KeyError(name)
+        hash_index, hash_count = found
+        return struct.unpack_from(
+            f"<{hash_count}Q",
+            self._map,
+            self._hashes_offset + hash_index * self._HASH.size,
+        )
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def get_sizes(self, name: str) -> Tuple[int, ...]:
+        """
+        Gets the decompressed size of each stock version of a file, in the order of
+        its hashes, with 0 for unknown sizes
+        """
+        found = self._find(name)
+        if found is None:
+            raise KeyError(name)
+        hash_index, hash_count = found
+        return struct.unpack_from(
+            f"<{hash_count}I",
+            self._map,
+            self._sizes_offset + hash_index * self._SIZE.size,
+        )
+
+
 @lru_cache(2)
-def get_hash_table(wiiu: bool = True) -> Dict[str, List[int]]:
-    return json.loads(
-        decompress(
-            (
-                get_exec_dir()
-                / "data"
-                / "hashes"
-                / f'{"wiiu" if wiiu else "switch"}.sjson'
-            ).read_bytes()
-        ).decode("utf-8")
-    )
+def get_hash_table(wiiu: bool = True) -> StockHashTable:
+    return StockHashTable(wiiu)
 
 
 @lru_cache(None)
@@ -1084,9 +1443,16 @@ def get_file_language(file: Union[Path, str]) -> str:
         raise ValueError(f"File {file} does not have a language specifier in its path")
 
 
+def _get_decompressed_size(header: bytes, size: int) -> int:
+    if header[0:4] == b"Yaz0" and len(header) >= 8:
+        return struct.unpack_from(">I", header, 4)[0]
+    return size
+
+
 def is_file_modded(name: str, file: Union[bytes, Path], count_new: bool = True) -> bool:
     table = get_hash_table(get_settings("wiiu"))
-    if name not in table:
+    stock_hashes = table.get(name)
+    if stock_hashes is None:
         return count_new
     contents = (
         file
@@ -1095,13 +1461,19 @@ def is_file_modded(name: str, file: Union[bytes, Path], count_new: bool = True)
         if isinstance(file, Path)
         else bytes(file)
     )
+    # A file with only one stock version cannot match it if their sizes differ
+    if len(stock_hashes) == 1 and table.get_sizes(name)[0] not in {
+        0,
+        _get_decompressed_size(contents[0:8], len(contents)),
+    }:
+        return True
     if contents[0:4] == b"Yaz0":
         try:
             contents = decompress(contents)
         except RuntimeError as err:
             raise ValueError(f"Invalid yaz0 file {name}") from err
     fhash = xxhash.xxh64_intdigest(contents)
-    return not fhash in table[name]
+    return not fhash in stock_hashes
 
 
 @lru_cache(None)
@@ -1116,27 +1488,94 @@ def unyaz_if_needed(file_bytes: bytes) -> bytes:
     return file_bytes if isinstance(file_bytes, bytes) else bytes(file_bytes)
 
 
-def inject_file_into_sarc(file: str, data: bytes, sarc: str, create_sarc: bool = False):
+def _write_files_into_sarc(files: Dict[str, bytes], sarc: str, create_sarc: bool):
     path = get_master_modpack_dir() / get_content_path() / sarc
-    if path.exists() or create_sarc:
-        if not path.exists():
-            path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy(get_game_file(sarc), path)
-        sarc_data = path.read_bytes()
-        yaz = sarc_data[0:4] == b"Yaz0"
-        if yaz:
-            sarc_data = decompress(sarc_data)
-        old_sarc = oead.Sarc(sarc_data)
-        del sarc_data
-        new_sarc = oead.SarcWriter.from_sarc(old_sarc)
-        del old_sarc
-        new_sarc.files[file] = data if isinstance(data, bytes) else bytes(data)
-        new_bytes = new_sarc.write()[1]
-        del new_sarc
-        path.write_bytes(new_bytes if not yaz else compress(new_bytes))
-        del new_bytes
+    if not path.exists():
+        if not create_sarc:
+            raise FileNotFoundError(f"{sarc} is not present in the master BCML mod")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(get_game_file(sarc), path)
+    sarc_data = path.read_bytes()
+    yaz = sarc_data[0:4] == b"Yaz0"
+    if yaz:
+        sarc_data = decompress(sarc_data)
+    old_sarc = oead.Sarc(sarc_data)
+    del sarc_data
+    new_sarc = oead.SarcWriter.from_sarc(old_sarc)
+    del old_sarc
+    for file, data in files.items():
+        new_sarc.files[file] = data
+    new_bytes = new_sarc.write()[1]
+    del new_sarc
+    path.write_bytes(new_bytes if not yaz else compress(new_bytes))
+    del new_bytes
+
+
+class SarcInjectionSession(AbstractContextManager):
+    """
+    Collects files injected into SARCs in the master mod with `inject_file_into_sarc`
+    and writes each SARC only once, when flushed or when the session exits
+    """
+
+    _active: Optional["SarcInjectionSession"] = None
+    _injections: Dict[str, Dict[str, bytes]]
+    _create: Dict[str, bool]
+    _outer: bool
+
+    def __init__(self):
+        self._injections = {}
+        self._create = {}
+        self._outer = False
+
+    @classmethod
+    def get_active(cls) -> Optional["SarcInjectionSession"]:
+        return cls._active
+
+    def __enter__(self):
+        if SarcInjectionSession._active is None:
+            SarcInjectionSession._active = self
+            self._outer = True
+            return self
+        return SarcInjectionSession._active
+
+    def __exit__(self, exctype, excinst, exctb):
+        if self._outer:
+            SarcInjectionSession._active = None
+            self.flush()
+
+    @property
+    def pending(self) -> set:
+        """The SARCs with injections waiting to be written"""
+        return set(self._injections.keys())
+
+    def add(self, file: str, data: bytes, sarc: str, create_sarc: bool = False):
+        if (
+            not (self._create.get(sarc, False) or create_sarc)
+            and not (get_master_modpack_dir() / get_content_path() / sarc).exists()
+        ):
+            raise FileNotFoundError(f"{sarc} is not present in the master BCML mod")
+        self._injections.setdefault(sarc, {})[file] = data
+        self._create[sarc] = self._create.get(sarc, False) or create_sarc
+
+    def get_file(self, file: str, sarc: str) -> Optional[bytes]:
+        """Gets the data waiting to be injected for a file, if any"""
+        return self._injections.get(sarc, {}).get(file)
+
+    def flush(self):
+        """Writes all pending injections to their SARCs"""
+        for sarc, files in self._injections.items():
+            _write_files_into_sarc(files, sarc, self._create[sarc])
+        self._injections.clear()
+        self._create.clear()
+
+
+def inject_file_into_sarc(file: str, data: bytes, sarc: str, create_sarc: bool = False):
+    data = data if isinstance(data, bytes) else bytes(data)
+    session = SarcInjectionSession.get_active()
+    if session:
+        session.add(file, data, sarc, create_sarc)
     else:
-        raise FileNotFoundError(f"{sarc} is not present in the master BCML mod")
+        _write_files_into_sarc({file: data}, sarc, create_sarc)
 
 
 def inject_files_into_actor(actor: str, files: Dict[str, ByteString]):
@@ -1147,11 +1586,22 @@ def inject_files_into_actor(actor: str, files: Dict[str, ByteString]):
         )
         if not title_path.exists():
             title_path = get_game_file("Pack/TitleBG.pack")
-        title_sarc = oead.Sarc(title_path.read_bytes())
-        actor_sarc = oead.Sarc(
-            decompress(title_sarc.get_file(f"Actor/Pack/{actor}.sbactorpack").data)
+        session = SarcInjectionSession.get_active()
+        pending = (
+            session.get_file(f"Actor/Pack/{actor}.sbactorpack", "Pack/TitleBG.pack")
+            if session
+            else None
         )
-        del title_sarc
+        if pending:
+            actor_sarc = oead.Sarc(decompress(pending))
+        else:
+            title_sarc = oead.Sarc(title_path.read_bytes())
+            actor_sarc = oead.Sarc(
+                decompress(
+                    title_sarc.get_file(f"Actor/Pack/{actor}.sbactorpack").data
+                )
+            )
+            del title_sarc
     else:
         actor_path = (
             get_master_modpack_dir()
@@ -1301,15 +1751,96 @@ def get_mod_link_meta(mod: BcmlMod):
     return f'<b>Link: <a style="text-decoration: none;" href="{url}">{favicon} {site_name}</a></b>'
 
 
+def _get_mod_index_path() -> Path:
+    return get_storage_dir() / "cache" / "mods.json"
+
+
+def _get_mod_index_version(modpack_dir: Path, index_path: Path) -> List[Any]:
+    try:
+        index_mtime = index_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        index_mtime = None
+    return [str(modpack_dir), modpack_dir.stat().st_mtime_ns, index_mtime]
+
+
+def _build_mod_index(modpack_dir: Path, old_mods: Dict[str, dict]) -> Dict[str, dict]:
+    mods = {}
+    for info in modpack_dir.glob("*/info.json"):
+        if info.parent.stem == "9999_BCML":
+            continue
+        mtime = info.stat().st_mtime_ns
+        old = old_mods.get(info.parent.name)
+        mods[info.parent.name] = {
+            "mtime": mtime,
+            "disabled": (info.parent / ".disabled").exists(),
+            "info": (
+                old["info"]
+                if old and old["mtime"] == mtime
+                else getattr(BcmlMod(info.parent), "_info")
+            ),
+        }
+    return mods
+
+
+def get_mod_index() -> Dict[str, dict]:
+    """
+    Gets the metadata of every installed mod by folder name. The index is kept in
+    memory and in the storage folder, and is only rebuilt when the mod folder
+    changes or it is invalidated, in which case only changed `info.json` files are
+    parsed again.
+    """
+    modpack_dir = get_modpack_dir()
+    index_path = _get_mod_index_path()
+    version = _get_mod_index_version(modpack_dir, index_path)
+    index = getattr(get_mod_index, "index", None)
+    if index and index["version"] == version:
+        return index["mods"]
+    old_mods = index["mods"] if index else {}
+    try:
+        stored = json.loads(index_path.read_text("utf-8"))
+        if stored["dir"] == str(modpack_dir) and stored["mtime"] == version[1]:
+            setattr(get_mod_index, "index", {"version": version, "mods": stored["mods"]})
+            return stored["mods"]
+        if stored["dir"] == str(modpack_dir):
+            old_mods = {**stored["mods"], **old_mods}
+    except (FileNotFoundError, KeyError, json.JSONDecodeError):
+        pass
+    mods = _build_mod_index(modpack_dir, old_mods)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(
+        json.dumps(
+            {"dir": str(modpack_dir), "mtime": version[1], "mods": mods},
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, index_path)
+    setattr(
+        get_mod_index,
+        "index",
+        {"version": _get_mod_index_version(modpack_dir, index_path), "mods": mods},
+    )
+    return mods
+
+
+def invalidate_mod_index():
+    """Discards the mod index after installed mods change in ways it cannot detect"""
+    if hasattr(get_mod_index, "index"):
+        delattr(get_mod_index, "index")
+    try:
+        _get_mod_index_path().unlink()
+    except FileNotFoundError:
+        pass
+
+
 def get_installed_mods(disabled: bool = False) -> List[BcmlMod]:
+    modpack_dir = get_modpack_dir()
     return sorted(
         {
-            BcmlMod.from_info(info)
-            for info in get_modpack_dir().glob("*/info.json")
-            if not (
-                info.parent.stem == "9999_BCML"
-                or (not disabled and (info.parent / ".disabled").exists())
-            )
+            BcmlMod(modpack_dir / folder, dict(mod["info"]))
+            for folder, mod in get_mod_index().items()
+            if disabled or not mod["disabled"]
         },
         key=lambda mod: mod.priority,
     )
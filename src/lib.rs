@@ -33,59 +33,55 @@ fn reload_settings() -> PyResult<()> {
 }
 
 #[pyfunction]
-fn find_modified_files(py: Python, mod_dir: String) -> PyResult<Vec<String>> {
+fn find_modified_files(py: Python, mod_dir: String, hash_table: String) -> PyResult<Vec<String>> {
     println!("Finding modified files...");
+    if let Err(e) = util::load_stock_sizes(Path::new(&hash_table)) {
+        println!("Could not load stock file sizes: {}", e);
+    }
     let mod_dir = Path::new(&mod_dir);
     let content = mod_dir.join(util::content());
     let dlc = mod_dir.join(util::dlc());
-    let files: Vec<PathBuf> = py.allow_threads(|| {
+    // Each file is read once, and modified SARCs are searched in the same buffer
+    let files: Vec<(String, Vec<String>)> = py.allow_threads(|| -> Result<_> {
         glob::glob(&mod_dir.join("**/*").to_string_lossy())
             .expect("Bad glob?!?!?!")
             .filter_map(std::result::Result::ok)
             .par_bridge()
-            .filter(|f| {
-                f.is_file()
-                    && (f.starts_with(&content) || f.starts_with(&dlc))
-                    && util::get_canon_name(unsafe { f.strip_prefix(mod_dir).unwrap_unchecked() })
-                        .and_then(|canon| {
-                            fs::read(f)
-                                .ok()
-                                .map(|data| util::is_file_modded(&canon, &data))
-                        })
-                        .unwrap_or(false)
-            })
-            .collect()
-    });
-    println!("Found {} modified files...", files.len());
-    let sarc_files: Vec<String> = py.allow_threads(|| -> Result<Vec<String>> {
-        Ok(files
-            .par_iter()
-            .filter(|f| {
-                fs::metadata(f).expect("No file metadata!?!?!?!").len() > 4
-                    && f.extension()
-                        .and_then(|ext| ext.to_str())
-                        .map(|ext| botw_utils::extensions::SARC_EXTS.contains(&ext))
-                        .unwrap_or(false)
-            })
-            .map(|file| -> Result<Vec<String>> {
-                let sarc = Sarc::new(fs::read(file)?)?;
-                find_modded_sarc_files(
-                    &sarc,
-                    file.starts_with(&dlc),
-                    &unsafe { file.strip_prefix(mod_dir).unwrap_unchecked() }.to_slash_lossy(),
+            .filter(|f| f.is_file() && (f.starts_with(&content) || f.starts_with(&dlc)))
+            .filter_map(|f| {
+                let path = unsafe { f.strip_prefix(mod_dir).unwrap_unchecked() };
+                let canon = util::get_canon_name(path)?;
+                let data = fs::read(&f).ok()?;
+                if !util::is_file_modded(&canon, &data) {
+                    return None;
+                }
+                Some(
+                    scan_modified_file(path, &data, f.starts_with(&dlc))
+                        .map(|sarc_files| (f.to_slash_lossy(), sarc_files)),
                 )
             })
-            .collect::<Result<Vec<_>>>()?
-            .into_par_iter()
-            .flatten()
-            .collect())
+            .collect()
     })?;
+    println!("Found {} modified files...", files.len());
+    let (files, sarc_files): (Vec<String>, Vec<Vec<String>>) = files.into_iter().unzip();
+    let sarc_files: Vec<String> = sarc_files.into_iter().flatten().collect();
     println!("Found {} modified files in SARCs...", sarc_files.len());
-    Ok(files
-        .into_par_iter()
-        .map(|file| file.to_slash_lossy())
-        .chain(sarc_files.into_par_iter())
-        .collect())
+    Ok(files.into_iter().chain(sarc_files.into_iter()).collect())
+}
+
+fn scan_modified_file(path: &Path, data: &[u8], aoc: bool) -> Result<Vec<String>> {
+    if data.len() > 4
+        && path
+            .extension()
+            .and_then(|ext| ext.to_str())
+            .map(|ext| botw_utils::extensions::SARC_EXTS.contains(&ext))
+            .unwrap_or(false)
+    {
+        let sarc = Sarc::new(data)?;
+        find_modded_sarc_files(&sarc, aoc, &path.to_slash_lossy())
+    } else {
+        Ok(vec![])
+    }
 }
 
 fn find_modded_sarc_files(sarc: &Sarc, aoc: bool, path: &str) -> Result<Vec<String>> {
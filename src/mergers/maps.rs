@@ -1,12 +1,8 @@
-use crate::{
-    settings::Settings,
-    util::{self, HashMap},
-};
+use crate::{settings::Settings, util};
 use anyhow::{Context, Result};
 use fs_err as fs;
 use join_str::jstr;
 use pyo3::prelude::*;
-use rayon::prelude::*;
 use roead::{
     byml::{Byml, Hash},
     yaz0::{compress, decompress},
@@ -19,7 +15,7 @@ use std::{
 
 pub fn maps_mod(py: Python, parent: &PyModule) -> PyResult<()> {
     let maps_module = PyModule::new(py, "maps")?;
-    maps_module.add_wrapped(wrap_pyfunction!(merge_maps))?;
+    maps_module.add_wrapped(wrap_pyfunction!(merge_map_unit))?;
     parent.add_submodule(maps_module)?;
     Ok(())
 }
@@ -255,22 +251,15 @@ fn merge_map(map_unit: MapUnit, diff: &Hash, settings: &Settings) -> Result<(Str
     ))
 }
 
+/// Merges a single map unit from its binary BYML diff, returning the unit's resource
+/// path and RSTB size. The GIL is released while merging, so units can be merged in
+/// parallel from a thread pool, sharing the stock files already loaded.
 #[pyfunction]
-pub fn merge_maps(py: Python, diff_bytes: Vec<u8>) -> PyResult<PyObject> {
-    let diffs = Byml::from_binary(&diff_bytes).map_err(anyhow::Error::from)?;
-    let rstb_values: HashMap<String, u32> = if let Byml::Hash(diffs) = diffs {
-        py.allow_threads(|| -> Result<HashMap<String, u32>> {
-            let settings = util::settings().clone();
-            diffs
-                .into_par_iter()
-                .map(|(unit, diff)| {
-                    let map_unit = MapUnit::from_unit_name(&unit, false)?;
-                    merge_map(map_unit, diff.as_hash()?, &settings)
-                })
-                .collect::<Result<HashMap<String, u32>>>()
-        })?
-    } else {
-        Default::default()
-    };
-    Ok(rstb_values.into_py(py))
+pub fn merge_map_unit(py: Python, unit: String, diff_bytes: Vec<u8>) -> PyResult<(String, u32)> {
+    let settings = util::settings().clone();
+    Ok(py.allow_threads(|| -> Result<(String, u32)> {
+        let diff = Byml::from_binary(&diff_bytes)?;
+        let map_unit = MapUnit::from_unit_name(&unit, false)?;
+        merge_map(map_unit, diff.as_hash()?, &settings)
+    })?)
 }
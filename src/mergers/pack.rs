@@ -42,34 +42,23 @@ fn merge_sarc(sarcs: Vec<Sarc>, endian: Endian) -> Result<Vec<u8>> {
     let files = all_files
         .into_iter()
         .map(|file| {
-            let mut modded = true;
-            let data = sarcs
+            // Each SARC is searched once per file through its sorted name hash table,
+            // rather than scanning every file in every SARC for every name
+            let versions: Vec<&[u8]> = sarcs.iter().filter_map(|s| s.get_data(&file)).collect();
+            let canon = file.cow_replace(".s", ".");
+            let (data, modded) = match versions
                 .iter()
                 .rev()
-                .filter_map(|s| {
-                    let data = s.files().find_map(|f| {
-                        if f.unwrap_name() == file {
-                            Some(f.data().to_vec())
-                        } else {
-                            None
-                        }
-                    });
-                    data
-                })
-                .find(|d| util::is_file_modded(&file.cow_replace(".s", "."), d))
-                .or_else(|| {
-                    modded = false;
-                    sarcs.iter().find_map(|s| {
-                        s.files().find_map(|f| {
-                            if f.unwrap_name() == file {
-                                Some(f.data().to_vec())
-                            } else {
-                                None
-                            }
-                        })
-                    })
-                })
-                .context("Can't find any SARCs versions for file")?;
+                .find(|d| util::is_file_modded(&canon, d))
+            {
+                Some(data) => (*data, true),
+                None => (
+                    *versions
+                        .first()
+                        .context("Can't find any SARCs versions for file")?,
+                    false,
+                ),
+            };
 
             let file_path = Path::new(&file);
 
@@ -83,13 +72,9 @@ fn merge_sarc(sarcs: Vec<Sarc>, endian: Endian) -> Result<Vec<u8>> {
                     .unwrap_or_default()
                 && !SPECIAL.iter().any(|s| file.as_str().contains(s))
             {
-                let nest_sarcs: Vec<Sarc> = sarcs
+                let nest_sarcs: Vec<Sarc> = versions
                     .iter()
-                    .filter_map(|s| {
-                        s.files()
-                            .find(|f| f.name() == Some(&file))
-                            .and_then(|d| Sarc::new(d.data().to_vec()).ok())
-                    })
+                    .filter_map(|d| Sarc::new(d.to_vec()).ok())
                     .collect();
                 let mut merged = merge_sarc(nest_sarcs, endian)?;
                 if file_path
@@ -100,9 +85,9 @@ fn merge_sarc(sarcs: Vec<Sarc>, endian: Endian) -> Result<Vec<u8>> {
                     merged = compress(&merged);
                 }
 
-                Ok((file, merged.as_slice().into()))
+                Ok((file, merged))
             } else {
-                Ok((file, data))
+                Ok((file, data.to_vec()))
             }
         })
         .collect::<Result<Vec<(String, Vec<u8>)>>>()?;
@@ -150,3 +135,83 @@ pub fn merge_sarcs(py: Python, diffs: HashMap<PathBuf, Vec<PathBuf>>) -> PyResul
     })?;
     Ok(())
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::time::Instant;
+
+    const MODS: usize = 10;
+    const FILES: usize = 2000;
+
+    fn mod_stack() -> Vec<Sarc<'static>> {
+        (0..MODS)
+            .map(|i| {
+                // Each mod shares most of its files with the rest and adds a few of its own
+                let files = (0..FILES).map(|j| {
+                    let name = if j % 10 == 0 {
+                        format!("Actor/Mod{}/File{}.bxml", i, j)
+                    } else {
+                        format!("Actor/File{}.bxml", j)
+                    };
+                    (name, vec![i as u8, (j % 256) as u8, (j / 256) as u8])
+                });
+                Sarc::new(
+                    SarcWriter::new(Endian::Little)
+                        .with_files(files)
+                        .to_binary(),
+                )
+                .unwrap()
+            })
+            .collect()
+    }
+
+    #[test]
+    fn indexed_lookup_matches_scan() {
+        let sarcs = mod_stack();
+        let names: Vec<String> = sarcs
+            .iter()
+            .flat_map(|s| s.files().map(|f| f.unwrap_name().to_owned()))
+            .collect::<HashSet<String>>()
+            .into_iter()
+            .collect();
+
+        let start = Instant::now();
+        let scanned: Vec<Vec<Vec<u8>>> = names
+            .iter()
+            .map(|name| {
+                sarcs
+                    .iter()
+                    .filter_map(|s| {
+                        s.files()
+                            .find(|f| f.unwrap_name() == name)
+                            .map(|f| f.data().to_vec())
+                    })
+                    .collect()
+            })
+            .collect();
+        let scan_time = start.elapsed();
+
+        let start = Instant::now();
+        let indexed: Vec<Vec<Vec<u8>>> = names
+            .iter()
+            .map(|name| {
+                sarcs
+                    .iter()
+                    .filter_map(|s| s.get_data(name).map(|d| d.to_vec()))
+                    .collect()
+            })
+            .collect();
+        let index_time = start.elapsed();
+
+        assert_eq!(scanned, indexed);
+        println!(
+            "{} files in {} mods: scan {:?}, indexed {:?}",
+            names.len(),
+            MODS,
+            scan_time,
+            index_time
+        );
+        assert!(index_time < scan_time);
+    }
+}
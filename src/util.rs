@@ -1,10 +1,11 @@
 use anyhow::Result;
 use join_str::jstr;
 use once_cell::sync::Lazy;
-use parking_lot::{Mutex, RwLockReadGuard};
+use parking_lot::{Mutex, RwLock, RwLockReadGuard};
 use roead::sarc::Sarc;
 pub use rustc_hash::{FxHashMap as HashMap, FxHashSet as HashSet};
 use std::{
+    cmp::Ordering,
     path::{Path, PathBuf},
     sync::Arc,
 };
@@ -17,6 +18,107 @@ pub static HASH_TABLE_SWITCH: Lazy<hashes::StockHashTable> =
     Lazy::new(|| hashes::StockHashTable::new(&hashes::Platform::Switch));
 static STOCK_PACKS: Lazy<Mutex<HashMap<PathBuf, Arc<Sarc<'static>>>>> =
     Lazy::new(|| Mutex::new(HashMap::default()));
+static STOCK_SIZES: Lazy<RwLock<Option<Arc<StockSizes>>>> = Lazy::new(|| RwLock::new(None));
+
+const STOCK_TABLE_MAGIC: &[u8] = b"BCHT";
+const STOCK_TABLE_VERSION: u32 = 2;
+
+#[inline]
+fn read_u32(data: &[u8], offset: usize) -> Option<u32> {
+    data.get(offset..offset + 4)
+        .map(|b| u32::from_le_bytes([b[0], b[1], b[2], b[3]]))
+}
+
+/// The decompressed sizes of stock files, read from the hash table BCML compiles
+/// from its bundled hashes and the game dump. The layout matches
+/// `bcml.util.StockHashTable`: a header, sorted name entries, u64 hashes, a u32 size
+/// for each hash and a string blob.
+pub struct StockSizes {
+    path: PathBuf,
+    data: Vec<u8>,
+    count: usize,
+    sizes_offset: usize,
+    strings_offset: usize,
+}
+
+impl StockSizes {
+    pub fn open(path: &Path) -> Result<Self> {
+        let data = fs_err::read(path)?;
+        if data.get(..4) != Some(STOCK_TABLE_MAGIC)
+            || read_u32(&data, 4) != Some(STOCK_TABLE_VERSION)
+        {
+            anyhow::bail!("{} is not a valid BCML hash table", path.display());
+        }
+        let count = read_u32(&data, 8).unwrap_or_default() as usize;
+        let hash_count = read_u32(&data, 12).unwrap_or_default() as usize;
+        let sizes_offset = 16 + count * 16 + hash_count * 8;
+        let strings_offset = sizes_offset + hash_count * 4;
+        if data.len() < strings_offset {
+            anyhow::bail!("{} is truncated", path.display());
+        }
+        Ok(Self {
+            path: path.to_owned(),
+            data,
+            count,
+            sizes_offset,
+            strings_offset,
+        })
+    }
+
+    #[inline]
+    fn entry(&self, index: usize) -> [usize; 4] {
+        let offset = 16 + index * 16;
+        [0, 4, 8, 12].map(|i| read_u32(&self.data, offset + i).unwrap_or_default() as usize)
+    }
+
+    /// Gets the decompressed size of a file if it has only one stock version and its
+    /// size is known
+    pub fn get(&self, canon: &str) -> Option<usize> {
+        let key = canon.as_bytes();
+        let (mut low, mut high) = (0, self.count);
+        while low < high {
+            let mid = (low + high) / 2;
+            let [str_offset, str_len, hash_index, hash_count] = self.entry(mid);
+            let start = self.strings_offset + str_offset;
+            match self.data.get(start..start + str_len)?.cmp(key) {
+                Ordering::Less => low = mid + 1,
+                Ordering::Greater => high = mid,
+                Ordering::Equal => {
+                    if hash_count != 1 {
+                        return None;
+                    }
+                    return read_u32(&self.data, self.sizes_offset + hash_index * 4)
+                        .filter(|size| *size > 0)
+                        .map(|size| size as usize);
+                }
+            }
+        }
+        None
+    }
+}
+
+/// Loads the stock file sizes from a compiled hash table, unless already loaded
+pub fn load_stock_sizes(path: &Path) -> Result<()> {
+    if STOCK_SIZES
+        .read()
+        .as_ref()
+        .map(|sizes| sizes.path == path)
+        .unwrap_or_default()
+    {
+        return Ok(());
+    }
+    let sizes = StockSizes::open(path)?;
+    *STOCK_SIZES.write() = Some(Arc::new(sizes));
+    Ok(())
+}
+
+#[inline]
+fn decompressed_size(data: &[u8]) -> usize {
+    match data {
+        [b'Y', b'a', b'z', b'0', a, b, c, d, ..] => u32::from_be_bytes([*a, *b, *c, *d]) as usize,
+        _ => data.len(),
+    }
+}
 
 #[inline(always)]
 pub fn settings() -> RwLockReadGuard<'static, crate::settings::Settings> {
@@ -29,6 +131,17 @@ pub fn settings() -> RwLockReadGuard<'static, crate::settings::Settings> {
 
 #[inline]
 pub fn is_file_modded(canon: &str, data: &[u8]) -> bool {
+    // Skip decompressing and hashing when the size alone rules out the only stock
+    // version of the file
+    if STOCK_SIZES
+        .read()
+        .as_ref()
+        .and_then(|sizes| sizes.get(canon))
+        .map(|size| size != decompressed_size(data))
+        .unwrap_or_default()
+    {
+        return true;
+    }
     if settings().wiiu {
         HASH_TABLE_WIIU.is_file_modded(canon, data, true)
     } else {
@@ -0,0 +1,28 @@
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+from pathlib import Path
+
+import pytest
+
+from bcml import util
+
+
+@pytest.fixture(autouse=True)
+def bcml_env(tmp_path: Path, monkeypatch):
+    """Points BCML's data and storage folders at a temporary folder for each test"""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    monkeypatch.setattr(util, "get_data_dir", lambda: data_dir)
+    monkeypatch.setattr(
+        util.get_settings,
+        "settings",
+        {
+            **util.DEFAULT_SETTINGS,
+            "store_dir": str(tmp_path / "store"),
+            "wiiu": False,
+        },
+        raising=False,
+    )
+    util.get_hash_table.cache_clear()
+    yield tmp_path
+    util.get_hash_table.cache_clear()
@@ -0,0 +1,81 @@
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+import os
+
+import oead
+import pytest
+
+from bcml import cache, util
+
+
+@pytest.fixture
+def game_files(tmp_path, monkeypatch):
+    game_dir = tmp_path / "game"
+    game_dir.mkdir()
+    (game_dir / "Pack").mkdir()
+    (game_dir / "Pack" / "Bootup.pack").write_bytes(b"SARC" + bytes(60))
+    monkeypatch.setattr(
+        util, "get_game_file", lambda file, aoc=False: game_dir / str(file)
+    )
+    return game_dir
+
+
+def _get_diff() -> oead.byml.Hash:
+    return oead.byml.Hash({"Flag": oead.byml.Array(["A", "B"])})
+
+
+def test_key_is_stable(game_files):
+    assert cache.get_key(
+        "gamedata", _get_diff(), ["Pack/Bootup.pack"]
+    ) == cache.get_key("gamedata", _get_diff(), ["Pack/Bootup.pack"])
+
+
+def test_key_changes_with_inputs(game_files):
+    base = cache.get_key("packs", {"a": 1}, ["Pack/Bootup.pack"])
+    assert base.startswith("packs-")
+    assert cache.get_key("packs", {"a": 2}, ["Pack/Bootup.pack"]) != base
+    assert cache.get_key("actors", {"a": 1}, ["Pack/Bootup.pack"]) != base
+    assert cache.get_key("packs", {"a": 1}, ["Pack/Bootup.pack"], "extra") != base
+    assert cache.get_key("packs", {"a": 1}) != base
+
+
+def test_key_changes_with_platform(game_files, monkeypatch):
+    base = cache.get_key("packs", {"a": 1}, ["Pack/Bootup.pack"])
+    monkeypatch.setitem(util.get_settings.settings, "wiiu", True)
+    assert cache.get_key("packs", {"a": 1}, ["Pack/Bootup.pack"]) != base
+
+
+def test_key_changes_with_stock_file(game_files):
+    stock = game_files / "Pack" / "Bootup.pack"
+    base = cache.get_key("packs", {"a": 1}, ["Pack/Bootup.pack"])
+    stat = stock.stat()
+    os.utime(stock, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    touched = cache.get_key("packs", {"a": 1}, ["Pack/Bootup.pack"])
+    assert touched != base
+    stock.write_bytes(stock.read_bytes() + b"\0")
+    assert cache.get_key("packs", {"a": 1}, ["Pack/Bootup.pack"]) not in {
+        base,
+        touched,
+    }
+    stock.unlink()
+    assert cache.get_stock_version("Pack/Bootup.pack").endswith(":missing")
+
+
+def test_save_and_load():
+    assert cache.load("packs-missing") is None
+    cache.save("packs-test", b"merged")
+    assert cache.load("packs-test") == b"merged"
+    assert not list(cache.get_cache_dir().glob("*.tmp"))
+
+
+def test_evict_removes_least_recently_used():
+    for i in range(4):
+        cache.save(f"packs-{i}", bytes(100))
+        path = cache.get_cache_dir() / f"packs-{i}"
+        os.utime(path, (1_000_000 + i, 1_000_000 + i))
+    cache.load("packs-0")
+    cache.evict(250)
+    assert sorted(entry.name for entry in cache.get_cache_dir().iterdir()) == [
+        "packs-0",
+        "packs-3",
+    ]
@@ -0,0 +1,153 @@
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+import json
+import os
+from pathlib import Path
+
+import oead
+import pytest
+from oead.aamp import Parameter, ParameterIO, ParameterList, ParameterObject
+
+from bcml import difflog
+
+FILES = [
+    "Actor/Pack/A.bactorpack//Actor/Physics/A.bphysics",
+    "Actor/Pack/B.bactorpack//Actor/Physics/B.bphysics",
+]
+
+
+def _get_pio(value: int) -> ParameterIO:
+    pio = ParameterIO()
+    obj = ParameterObject()
+    obj.params["Value"] = Parameter(value)
+    pio.objects["Test"] = obj
+    return pio
+
+
+def _get_deep_diff() -> ParameterIO:
+    pio = ParameterIO()
+    pio.objects["FileTable"] = ParameterObject()
+    for i, file in enumerate(FILES):
+        pio.objects["FileTable"].params[f"File{i}"] = Parameter(file)
+        plist = ParameterList()
+        plist.objects["Test"] = _get_pio(i).objects["Test"]
+        pio.lists[file] = plist
+    return pio
+
+
+def _touch(path: Path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    log_dir = tmp_path / "mod" / "logs"
+    log_dir.mkdir(parents=True)
+    (log_dir / "map.yml").write_text(
+        "A-1_Static: {Objs: {add: [1, 2]}}\nB-2_Dynamic: {Objs: {add: [3]}}\n",
+        encoding="utf-8",
+    )
+    (log_dir / "packs.json").write_text(
+        json.dumps(
+            {
+                "Actor/Pack/A.bactorpack": "content/Actor/Pack/A.sbactorpack",
+                "Actor/Pack/B.bactorpack": "content/Actor/Pack/B.sbactorpack",
+            }
+        ),
+        encoding="utf-8",
+    )
+    (log_dir / "deepmerge.aamp").write_bytes(bytes(_get_deep_diff().to_binary()))
+    (log_dir / "shop.aamp").write_bytes(bytes(_get_pio(1).to_binary()))
+    (log_dir / "texts.log").write_text("USen\nJPja\n", encoding="utf-8")
+    difflog._CONTAINERS.clear()
+    yield log_dir
+    difflog._CONTAINERS.clear()
+
+
+def _get_logs(log_dir: Path) -> dict:
+    return {
+        "map.yml": oead.byml.from_text((log_dir / "map.yml").read_text("utf-8")),
+        "packs.json": json.loads((log_dir / "packs.json").read_text("utf-8")),
+        "deepmerge.aamp": _get_deep_diff(),
+        "shop.aamp": _get_pio(1),
+        "texts.log": "USen\nJPja\n",
+    }
+
+
+def _assert_equal(data, expected):
+    if isinstance(expected, ParameterIO):
+        assert data.to_binary() == expected.to_binary()
+    else:
+        assert data == expected
+
+
+def test_round_trip(log_dir):
+    logs = _get_logs(log_dir)
+    for name, expected in logs.items():
+        _assert_equal(difflog.read_log(log_dir / name), expected)
+    assert not (log_dir / difflog.CONTAINER_NAME).exists()
+    difflog.write_container(log_dir)
+    container = difflog.DiffLog(log_dir / difflog.CONTAINER_NAME)
+    assert all(container.is_current(log_dir / name) for name in logs)
+    difflog._CONTAINERS.clear()
+    for name, expected in logs.items():
+        _assert_equal(difflog.read_log(log_dir / name), expected)
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_read_by_file(log_dir, compiled):
+    if compiled:
+        difflog.write_container(log_dir)
+    assert difflog.get_log_keys(log_dir / "map.yml") == ["A-1_Static", "B-2_Dynamic"]
+    assert difflog.get_log_keys(log_dir / "deepmerge.aamp") == FILES
+    assert difflog.get_log_keys(log_dir / "texts.log") == []
+    assert difflog.read_log(log_dir / "map.yml", ["B-2_Dynamic", "C-3_Static"]) == (
+        oead.byml.from_text("B-2_Dynamic: {Objs: {add: [3]}}")
+    )
+    assert difflog.read_log(log_dir / "packs.json", ["Actor/Pack/A.bactorpack"]) == {
+        "Actor/Pack/A.bactorpack": "content/Actor/Pack/A.sbactorpack"
+    }
+    deep = difflog.read_log(log_dir / "deepmerge.aamp", [FILES[1]])
+    assert [file.v for _, file in deep.objects["FileTable"].params.items()] == [
+        FILES[1]
+    ]
+    assert deep.lists[FILES[1]].objects["Test"].params["Value"].v == 1
+    assert difflog.read_log(log_dir / "texts.log", ["USen"]) == "USen\nJPja\n"
+
+
+def test_text_aamp_log(log_dir):
+    (log_dir / "shop.aamp").write_text(_get_pio(2).to_text(), encoding="utf-8")
+    difflog.write_container(log_dir)
+    assert (
+        difflog.read_log(log_dir / "shop.aamp").to_binary() == _get_pio(2).to_binary()
+    )
+
+
+def test_changed_log_is_reread(log_dir):
+    difflog.write_container(log_dir)
+    old = difflog.DiffLog(log_dir / difflog.CONTAINER_NAME)
+    (log_dir / "packs.json").write_text(json.dumps({"a": "b"}), encoding="utf-8")
+    _touch(log_dir / "packs.json")
+    assert not old.is_current(log_dir / "packs.json")
+    assert difflog.read_log(log_dir / "packs.json") == {"a": "b"}
+    assert difflog.DiffLog(log_dir / difflog.CONTAINER_NAME).path.stat() == (
+        old.path.stat()
+    )
+    difflog.write_container(log_dir)
+    new = difflog.DiffLog(log_dir / difflog.CONTAINER_NAME)
+    assert new.is_current(log_dir / "packs.json")
+    assert new.read("packs.json") == {"a": "b"}
+    assert new.read("map.yml") == old.read("map.yml")
+    assert new.read("texts.log") == "USen\nJPja\n"
+    (log_dir / "map.yml").unlink()
+    assert not new.is_current(log_dir / "map.yml")
+
+
+def test_invalid_container_is_ignored(log_dir):
+    (log_dir / difflog.CONTAINER_NAME).write_bytes(b"junk")
+    assert difflog.read_log(log_dir / "texts.log") == "USen\nJPja\n"
+    difflog.write_container(log_dir)
+    assert difflog.DiffLog(log_dir / difflog.CONTAINER_NAME).is_current(
+        log_dir / "texts.log"
+    )
@@ -0,0 +1,209 @@
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+import json
+from typing import Dict, Iterable
+
+import oead
+import pytest
+from oead.byml import Array, Hash
+
+from bcml.mergers import data
+
+FLAG_COUNT = 5000
+
+
+def _get_entry(name: str, value: int = 0) -> Hash:
+    return Hash(
+        {"DataName": name, "DeleteRev": oead.S32(-1), "InitValue": oead.S32(value)}
+    )
+
+
+def _get_diff(changes: Dict[str, int], deleted: Iterable[str] = ()) -> Hash:
+    return Hash(
+        {
+            "bool_data": Hash(
+                {
+                    "add": Hash(
+                        {
+                            name: _get_entry(name, value)
+                            for name, value in changes.items()
+                        }
+                    ),
+                    "del": Array(list(deleted)),
+                }
+            )
+        }
+    )
+
+
+def _merge(modded_entries: Hash, sarc_path):
+    merged, chunk_hashes = data.merge_gamedata_chunks(modded_entries, sarc_path)
+    sarc_path.write_bytes(merged)
+    sarc_path.with_name(f"{sarc_path.stem}_chunks.json").write_text(
+        json.dumps(chunk_hashes), encoding="utf-8"
+    )
+    return oead.Sarc(merged), chunk_hashes
+
+
+def _get_files(sarc: oead.Sarc) -> Dict[str, bytes]:
+    return {file.name: bytes(file.data) for file in sarc.get_files()}
+
+
+@pytest.fixture(autouse=True)
+def stock_gamedata(monkeypatch):
+    """Replaces the stock gamedata with two bgdata files of bool flags"""
+    stock = oead.SarcWriter(endian=oead.Endianness.Little)
+    index = {"bool_data": {}}
+    names = [f"Flag_{i:04}" for i in range(FLAG_COUNT)]
+    for i in range(2):
+        file_name = f"/bool_data_{i}.bgdata"
+        entries = [_get_entry(name) for name in names[i::2]]
+        stock.files[file_name] = oead.byml.to_binary(
+            Hash({"bool_data": Array(entries)}), big_endian=False
+        )
+        index["bool_data"].update(
+            (entry["DataName"], (file_name, data.hash_gamedata_entry(entry)))
+            for entry in entries
+        )
+    stock_bytes = bytes(stock.write()[1])
+    monkeypatch.setattr(data, "get_stock_gamedata", lambda: oead.Sarc(stock_bytes))
+    monkeypatch.setattr(data, "get_stock_gamedata_index", lambda: index)
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Records the name of each gamedata chunk serialized from scratch"""
+    chunks = []
+    write_chunk = data._write_gamedata_chunk
+
+    def record_chunk(chunk, stock_entries):
+        chunks.append(chunk[0])
+        return write_chunk(chunk, stock_entries)
+
+    monkeypatch.setattr(data, "_write_gamedata_chunk", record_chunk)
+    return chunks
+
+
+def test_chunks_hold_sorted_flags(tmp_path, written):
+    merged, chunk_hashes = _merge(
+        _get_diff({"Flag_0001": 1, "Flag_5000": 1}, ["Flag_0000"]),
+        tmp_path / "gamedata.sarc",
+    )
+    assert sorted(written) == sorted(chunk_hashes)
+    assert set(chunk_hashes) == {"/bool_data_0.bgdata", "/bool_data_1.bgdata"}
+    chunks = [
+        oead.byml.from_binary(merged.get_file(name).data)["bool_data"]
+        for name in ["/bool_data_0.bgdata", "/bool_data_1.bgdata"]
+    ]
+    assert [len(chunk) for chunk in chunks] == [4096, FLAG_COUNT - 4096]
+    entries = [entry for chunk in chunks for entry in chunk]
+    assert [entry["DataName"] for entry in entries] == [
+        f"Flag_{i:04}" for i in range(1, FLAG_COUNT + 1)
+    ]
+    assert int(entries[0]["InitValue"]) == 1
+    assert int(entries[1]["InitValue"]) == 0
+    assert int(entries[-1]["InitValue"]) == 1
+
+
+def test_unchanged_chunks_are_reused(tmp_path, written):
+    sarc_path = tmp_path / "gamedata.sarc"
+    old, old_hashes = _merge(_get_diff({"Flag_0001": 1}), sarc_path)
+    written.clear()
+    new, new_hashes = _merge(_get_diff({"Flag_0001": 1, "Flag_4500": 1}), sarc_path)
+    assert written == ["/bool_data_1.bgdata"]
+    assert new_hashes["/bool_data_0.bgdata"] == old_hashes["/bool_data_0.bgdata"]
+    assert new_hashes["/bool_data_1.bgdata"] != old_hashes["/bool_data_1.bgdata"]
+    assert (
+        new.get_file("/bool_data_0.bgdata").data
+        == old.get_file("/bool_data_0.bgdata").data
+    )
+
+    written.clear()
+    fresh, fresh_hashes = _merge(
+        _get_diff({"Flag_0001": 1, "Flag_4500": 1}), tmp_path / "fresh.sarc"
+    )
+    assert len(written) == 2
+    assert fresh_hashes == new_hashes
+    assert _get_files(fresh) == _get_files(new)
+
+
+def test_chunks_shift_with_deleted_flags(tmp_path, written):
+    sarc_path = tmp_path / "gamedata.sarc"
+    _merge(_get_diff({"Flag_0001": 1}), sarc_path)
+    written.clear()
+    _merge(_get_diff({"Flag_0001": 1}, ["Flag_0000"]), sarc_path)
+    assert sorted(written) == ["/bool_data_0.bgdata", "/bool_data_1.bgdata"]
+
+
+def test_chunks_need_matching_hashes(tmp_path, written):
+    sarc_path = tmp_path / "gamedata.sarc"
+    _merge(_get_diff({"Flag_0001": 1}), sarc_path)
+    hash_path = tmp_path / "gamedata_chunks.json"
+    hash_path.write_text(
+        json.dumps({name: "0" for name in json.loads(hash_path.read_text())}),
+        encoding="utf-8",
+    )
+    written.clear()
+    data.merge_gamedata_chunks(_get_diff({"Flag_0001": 1}), sarc_path)
+    assert len(written) == 2
+
+    hash_path.unlink()
+    written.clear()
+    data.merge_gamedata_chunks(_get_diff({"Flag_0001": 1}), sarc_path)
+    assert len(written) == 2
+
+
+def test_only_needed_stock_flags_are_read():
+    chunk = ("/bool_data_0.bgdata", "bool_data", ["Flag_0000", "Flag_0002"], Hash())
+    stock_entries = data._get_stock_chunk_entries([chunk])
+    assert set(stock_entries["bool_data"]) == {"Flag_0000", "Flag_0002"}
+    chunk = (
+        "/bool_data_0.bgdata",
+        "bool_data",
+        ["Flag_0000", "Flag_0001"],
+        Hash({"Flag_0000": _get_entry("Flag_0000", 1)}),
+    )
+    assert set(data._get_stock_chunk_entries([chunk])["bool_data"]) == {"Flag_0001"}
+
+
+def test_corrupt_previous_merge_is_ignored(tmp_path, written):
+    sarc_path = tmp_path / "gamedata.sarc"
+    _merge(_get_diff({"Flag_0001": 1}), sarc_path)
+    sarc_path.write_bytes(b"junk")
+    written.clear()
+    data.merge_gamedata_chunks(_get_diff({"Flag_0001": 1}), sarc_path)
+    assert len(written) == 2
+
+
+def test_diff_uses_only_the_index(monkeypatch):
+    def fail_stock():
+        raise AssertionError("Stock gamedata was parsed")
+
+    monkeypatch.setattr(data, "get_stock_gamedata", fail_stock)
+    modded = oead.byml.to_binary(
+        Hash(
+            {
+                "bool_data": Array(
+                    [
+                        _get_entry("Flag_0000"),
+                        _get_entry("Flag_0001", 1),
+                        _get_entry("Flag_New", 1),
+                    ]
+                )
+            }
+        ),
+        big_endian=False,
+    )
+    added, names = {}, {}
+    data.diff_gamedata_file(modded, added, names)
+    assert set(added["bool_data"].keys()) == {"Flag_0001", "Flag_New"}
+    assert names["bool_data"] == {"Flag_0000", "Flag_0001", "Flag_New"}
+
+
+def test_cached_merge_keeps_chunk_hashes(tmp_path):
+    sarc_path = tmp_path / "gamedata.sarc"
+    _, chunk_hashes = _merge(_get_diff({"Flag_0001": 1}), sarc_path)
+    raw = sarc_path.read_bytes()
+    cached = data._encode_cached_merge(raw, chunk_hashes)
+    assert data._decode_cached_merge(cached) == (raw, chunk_hashes)
+    assert data._decode_cached_merge(raw) is None
@@ -0,0 +1,110 @@
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+import json
+import pickle
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import oead
+import pytest
+
+from bcml import util
+
+
+@lru_cache(2)
+def _get_source_table(wiiu: bool) -> Dict[str, List[int]]:
+    return json.loads(
+        oead.yaz0.decompress(
+            (
+                util.get_exec_dir()
+                / "data"
+                / "hashes"
+                / f'{"wiiu" if wiiu else "switch"}.sjson'
+            ).read_bytes()
+        ).decode("utf-8")
+    )
+
+
+@pytest.mark.parametrize("wiiu", [True, False])
+def test_lookups_match_source(wiiu):
+    source = _get_source_table(wiiu)
+    table = util.get_hash_table(wiiu)
+    assert len(table) == len(source)
+    names = sorted(source)
+    for name in names[:: max(len(names) // 2000, 1)] + [names[0], names[-1]]:
+        assert name in table
+        assert table[name] == tuple(sorted(set(source[name])))
+        assert table.get(name) == table[name]
+
+
+@pytest.mark.parametrize("wiiu", [True, False])
+def test_missing_names(wiiu):
+    table = util.get_hash_table(wiiu)
+    for name in ["", "Actor/Pack/NotAnActor.sbactorpack", "~~~"]:
+        assert name not in table
+        assert table.get(name) is None
+        with pytest.raises(KeyError):
+            table[name]  # pylint: disable=pointless-statement
+    assert 1 not in table
+
+
+def test_table_is_cached_and_compiled_once():
+    table = util.get_hash_table(False)
+    assert util.get_hash_table(False) is table
+    assert util.get_hash_table(True) is not table
+    compiled = list((util.get_data_dir() / "hashes").glob("switch-*.bin"))
+    assert len(compiled) == 1
+    util.get_hash_table.cache_clear()
+    reopened = util.get_hash_table(False)
+    assert list((util.get_data_dir() / "hashes").glob("switch-*.bin")) == compiled
+    name = next(iter(_get_source_table(False)))
+    assert reopened[name] == table[name]
+
+
+def test_pickles_by_platform():
+    table = util.get_hash_table(False)
+    assert pickle.loads(pickle.dumps(table)) is table
+    assert pickle.loads(pickle.dumps(util.get_hash_table(True))) is not table
+
+
+def _get_dump_names(table: Dict[str, List[int]]) -> Tuple[str, str]:
+    names = [name for name in table if ".s" not in name and not name.startswith("Aoc")]
+    return (
+        next(name for name in names if len(set(table[name])) == 1),
+        next(name for name in names if len(set(table[name])) > 1),
+    )
+
+
+def test_sizes_unknown_without_dump():
+    single, multiple = _get_dump_names(_get_source_table(False))
+    table = util.get_hash_table(False)
+    assert table.get_sizes(single) == (0,)
+    assert set(table.get_sizes(multiple)) == {0}
+    with pytest.raises(KeyError):
+        table.get_sizes("Actor/Pack/NotAnActor.sbactorpack")
+
+
+def test_sizes_from_game_dump(tmp_path, monkeypatch):
+    single, multiple = _get_dump_names(_get_source_table(False))
+    game_dir = tmp_path / "game"
+    for name, data in [
+        ("Pack/Dungeon000.pack", b""),
+        (single, b"Yaz0" + (1234).to_bytes(4, "big") + bytes(8)),
+        (multiple, bytes(10)),
+    ]:
+        (game_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (game_dir / name).write_bytes(data)
+    monkeypatch.setitem(util.get_settings.settings, "game_dir_nx", str(game_dir))
+    table = util.get_hash_table(False)
+    assert table.get_sizes(single) == (1234,)
+    assert set(table.get_sizes(multiple)) == {0}
+
+    def fail_hash(data):
+        raise AssertionError("File was hashed")
+
+    monkeypatch.setattr(util.xxhash, "xxh64_intdigest", fail_hash)
+    assert util.is_file_modded(single, bytes(1233))
+    with pytest.raises(AssertionError):
+        util.is_file_modded(single, bytes(1234))
+    with pytest.raises(AssertionError):
+        util.is_file_modded(multiple, bytes(1233))
@@ -0,0 +1,46 @@
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+from types import SimpleNamespace
+
+from bcml import install, util
+from bcml.mergers import merge, rstable
+
+
+def _write(root, files):
+    for file in files:
+        (root / file).parent.mkdir(parents=True, exist_ok=True)
+        (root / file).write_bytes(b"")
+
+
+def test_unsupplied_glob_outputs_are_cleaned(tmp_path, monkeypatch):
+    master, mod = tmp_path / "9999_BCML", tmp_path / "0100_Test"
+    _write(
+        master,
+        [
+            "content/Actor/Pack/Kept.sbactorpack",
+            "content/Actor/Pack/Stale.sbactorpack",
+            "content/Actor/ActorInfo.product.sbyml",
+            "content/System/Resource/ResourceSizeTable.product.srsizetable",
+            "logs/rstb.log",
+        ],
+    )
+    _write(
+        mod,
+        [
+            "content/Actor/Pack/Kept.sbactorpack",
+            "options/Extra/content/Actor/Pack/Option.sbactorpack",
+            "logs/deepmerge.aamp",
+        ],
+    )
+    _write(master, ["content/Actor/Pack/Option.sbactorpack"])
+    monkeypatch.setattr(util, "get_master_modpack_dir", lambda: master)
+    monkeypatch.setattr(util, "get_installed_mods", lambda: [SimpleNamespace(path=mod)])
+    install._clean_merged_files([merge.DeepMerger(), rstable.RstbMerger()])
+    assert sorted(
+        f.relative_to(master).as_posix() for f in master.rglob("*") if f.is_file()
+    ) == [
+        "content/Actor/ActorInfo.product.sbyml",
+        "content/Actor/Pack/Kept.sbactorpack",
+        "content/Actor/Pack/Option.sbactorpack",
+        "logs/rstb.log",
+    ]
@@ -0,0 +1,205 @@
+# Copyright 2020 Nicene Nerd <macadamiadaze@gmail.com>
+# Licensed under GPLv3+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import pytest
+
+from bcml import difflog, mergers, util
+from bcml.mergers import drop, merge, mubin, pack, quests, rstable, shop
+
+
+class _Mod:
+    """A stand-in for an installed mod with only logs and partial remerge files"""
+
+    def __init__(self, path: Path, logs: Iterable[str], partials: Dict[str, List[str]]):
+        self.path = path
+        (path / "logs").mkdir(parents=True)
+        for log in logs:
+            (path / "logs" / log).write_bytes(b"")
+        self._partials = partials
+
+    def get_partials(self) -> Dict[str, List[str]]:
+        return self._partials
+
+
+@pytest.mark.parametrize(
+    "files,other_files,overlap",
+    [
+        ({"Pack/TitleBG.pack"}, {"Pack/TitleBG.pack"}, True),
+        ({"*.pack"}, {"Pack/TitleBG.pack"}, True),
+        ({"Pack/TitleBG.pack"}, {"*.pack"}, True),
+        ({"*.pack"}, {"Actor/Pack/Link.bactorpack"}, False),
+        ({"*"}, {"System/Resource/ResourceSizeTable.product.rsizetable"}, True),
+        ({"*.pack", "!*Bootup*"}, {"Pack/Bootup.pack"}, False),
+        ({"Pack/Bootup.pack"}, {"*.pack", "!*Bootup*"}, False),
+        ({"*.pack", "!*Bootup*"}, {"Pack/TitleBG.pack", "Pack/Bootup.pack"}, True),
+        ({"Pack/TitleBG.pack//Map/MainField/*"}, {"Pack/TitleBG.pack"}, False),
+        ({"Pack/TitleBG.pack//Map/MainField/*"}, {"*.pack"}, False),
+        (
+            {"Pack/TitleBG.pack//Map/MainField/*"},
+            {"Pack/TitleBG.pack//Map/MainField/A-1/A-1_Static.smubin"},
+            True,
+        ),
+        (set(), {"*"}, False),
+    ],
+)
+def test_files_overlap(files, other_files, overlap):
+    assert mergers._files_overlap(files, other_files) is overlap
+
+
+def test_nested_files_overwritten_by_whole_sarc():
+    written = {"Pack/TitleBG.pack"}
+    assert mergers._is_overwritten(mubin.MapMerger(), written)
+    assert not mergers.reads_whole_files(
+        mubin.MapMerger(), {"Pack/TitleBG.pack//Actor/Pack/Link.bactorpack"}
+    )
+    assert mergers.reads_whole_files(mubin.MapMerger(), written)
+
+
+def test_map_change_keeps_packs_untouched():
+    names = [m.NAME for m in mergers.get_dependent_mergers([mubin.MapMerger()])]
+    assert names[0] == mubin.MapMerger.NAME
+    assert rstable.RstbMerger.NAME in names
+    for merger in [pack.PackMerger, drop.DropMerger, shop.ShopMerger]:
+        assert merger.NAME not in names
+
+
+def test_pack_change_remerges_readers():
+    remergers = {m.NAME: m for m in mergers.get_dependent_mergers([pack.PackMerger()])}
+    assert remergers[pack.PackMerger.NAME].partials is None
+    for merger in [mubin.MapMerger, rstable.RstbMerger]:
+        assert merger.NAME in remergers
+    names = list(remergers)
+    assert names == [m.NAME for m in mergers.sort_mergers(remergers.values())]
+
+
+def test_nested_change_keeps_sarc_mergers_untouched():
+    names = [m.NAME for m in mergers.get_dependent_mergers([quests.QuestMerger()])]
+    assert names[0] == quests.QuestMerger.NAME
+    for merger in [
+        pack.PackMerger,
+        merge.DeepMerger,
+        mubin.MapMerger,
+        drop.DropMerger,
+        shop.ShopMerger,
+    ]:
+        assert merger.NAME not in names
+
+
+def test_partial_pack_change_keeps_partials():
+    packs = pack.PackMerger()
+    packs.set_partials({"content/Actor/Pack/Test.sbactorpack"})
+    remergers = {m.NAME: m for m in mergers.get_dependent_mergers([packs])}
+    assert remergers[pack.PackMerger.NAME].partials == {
+        "content/Actor/Pack/Test.sbactorpack"
+    }
+    assert drop.DropMerger.NAME in remergers
+    assert shop.ShopMerger.NAME in remergers
+
+
+def test_repeated_partial_changes_are_combined():
+    first, second = pack.PackMerger(), pack.PackMerger()
+    first.set_partials({"content/Actor/Pack/A.sbactorpack"})
+    second.set_partials({"content/Actor/Pack/B.sbactorpack"})
+    remergers = {m.NAME: m for m in mergers.get_dependent_mergers([first, second])}
+    assert remergers[pack.PackMerger.NAME].partials == {
+        "content/Actor/Pack/A.sbactorpack",
+        "content/Actor/Pack/B.sbactorpack",
+    }
+    full = {
+        m.NAME: m for m in mergers.get_dependent_mergers([first, pack.PackMerger()])
+    }
+    assert full[pack.PackMerger.NAME].partials is None
+
+
+def test_mod_remergers(tmp_path):
+    mods = [
+        _Mod(
+            tmp_path / "0100_A",
+            ["packs.json", "map.yml"],
+            {pack.PackMerger.NAME: ["content/Actor/Pack/A.sbactorpack"]},
+        ),
+        _Mod(
+            tmp_path / "0101_B",
+            ["packs.json"],
+            {pack.PackMerger.NAME: ["content/Actor/Pack/B.sbactorpack"]},
+        ),
+    ]
+    remergers = {m.NAME: m for m in mergers.get_mod_remergers(mods)}
+    assert set(remergers) == {pack.PackMerger.NAME, mubin.MapMerger.NAME}
+    assert remergers[pack.PackMerger.NAME].partials == {
+        "content/Actor/Pack/A.sbactorpack",
+        "content/Actor/Pack/B.sbactorpack",
+    }
+    assert remergers[mubin.MapMerger.NAME].partials is None
+
+
+@pytest.mark.parametrize(
+    "merger,file,written",
+    [
+        (merge.DeepMerger(), "Actor/Pack/Link.bactorpack", True),
+        (merge.DeepMerger(), "Actor/ActorInfo.product.byml", False),
+        (pack.PackMerger(), "Pack/TitleBG.pack", True),
+        (pack.PackMerger(), "Pack/Bootup.pack", False),
+        (mubin.MapMerger(), "Pack/TitleBG.pack", False),
+        (drop.DropMerger(), "Pack/TitleBG.pack", True),
+    ],
+)
+def test_writes_file(merger, file, written):
+    assert mergers.writes_file(merger, file) is written
+
+
+def test_partial_pack_merge_reads_needed_sarcs(tmp_path, monkeypatch):
+    master = tmp_path / "9999_BCML"
+    for name in ["B", "C"]:
+        (master / "content" / "Actor" / "Pack").mkdir(parents=True, exist_ok=True)
+        (master / "content" / "Actor" / "Pack" / f"{name}.sbactorpack").write_bytes(b"")
+    mod = _Mod(tmp_path / "0100_A", [], {})
+    (mod.path / "logs" / "packs.json").write_text(
+        json.dumps(
+            {
+                f"Actor/Pack/{name}.bactorpack": f"content/Actor/Pack/{name}.sbactorpack"
+                for name in "ABC"
+            }
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(util, "get_master_modpack_dir", lambda: master)
+    monkeypatch.setattr(util, "get_installed_mods", lambda: [mod])
+    packs = pack.PackMerger()
+    assert len(packs.get_all_diffs()[mod]) == 3
+    packs.set_partials({"content/Actor/Pack/B.sbactorpack"})
+    assert packs.get_all_diffs()[mod] == {
+        "content/Actor/Pack/A.sbactorpack",
+        "content/Actor/Pack/B.sbactorpack",
+    }
+
+
+def test_map_units_are_read_one_at_a_time(tmp_path):
+    logs = [
+        "A-1_Static: {Objs: {add: [{HashId: 1}]}, Rails: {}}\n"
+        "B-2_Dynamic: {Objs: {del: [5]}, Rails: {}}\n",
+        "A-1_Static: {Objs: {add: [{HashId: 2}]}, Rails: {}}\n",
+        "C-3_Static: {add: [{HashId: 3}]}\n",
+    ]
+    log_dirs = []
+    for i, log in enumerate(logs):
+        log_dir = tmp_path / f"010{i}" / "logs"
+        log_dir.mkdir(parents=True)
+        (log_dir / "map.yml").write_text(log, encoding="utf-8")
+        log_dirs.append(log_dir)
+    for log_dir in log_dirs[1:]:
+        difflog.write_container(log_dir)
+    maps = mubin.MapMerger()
+    legacy = maps._read_map_log(log_dirs[2], ["C-3_Static"])
+    assert set(legacy["C-3_Static"]) == {"Objs", "Rails"}
+    assert list(maps._read_map_log(log_dirs[0], ["B-2_Dynamic"])) == ["B-2_Dynamic"]
+
+    expected = maps.consolidate_diffs(maps._read_map_log(d) for d in log_dirs)
+    units = ["A-1_Static", "B-2_Dynamic", "C-3_Static"]
+    preloaded = {log_dirs[0]: maps._read_map_log(log_dirs[0])}
+    assert dict(maps._get_unit_diffs(log_dirs, preloaded, units)) == {
+        unit: expected[unit] for unit in units
+    }